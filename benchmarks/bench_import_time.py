@@ -0,0 +1,72 @@
+"""
+Startup benchmark: time to import each collector module in a fresh interpreter, and a check that
+importing has no side effects (no output, no files created, no heavy optional dependencies loaded).
+
+Usage: python benchmarks/bench_import_time.py [repeats]
+"""
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+MODULES = [
+    "binance_kline_collector",
+    "participant_data_collector",
+    "news_collector",
+    "market_comparison_data",
+    "whale_data_collector",
+]
+# Dependencies that should only be loaded by the functions that need them
+HEAVY_MODULES = ["pandas", "yfinance", "san", "pyarrow"]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+sys.stdout = sys.__stdout__
+print("@@" + json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def probe(module, cwd):
+    """Imports `module` in a new interpreter running in `cwd`. Returns (result dict, other output lines)."""
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(SCRIPTS_DIR), PYTHONDONTWRITEBYTECODE="1")
+    completed = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                               cwd=cwd, env=env, capture_output=True, text=True)
+    lines = completed.stdout.splitlines()
+    results = [json.loads(line[2:]) for line in lines if line.startswith("@@")]
+    if completed.returncode != 0 or not results:
+        return None, (completed.stderr.strip().splitlines() or ["import failed"])[-1:]
+    return results[0], [line for line in lines if not line.startswith("@@")]
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'module':<30} {'best import':>12}  side effects")
+    for module in MODULES:
+        with tempfile.TemporaryDirectory() as cwd:
+            timings = []
+            output = []
+            loaded = []
+            for _ in range(repeats):
+                result, output = probe(module, cwd)
+                if result is None:
+                    break
+                timings.append(result["seconds"])
+                loaded = result["loaded"]
+            created = os.listdir(cwd)
+        if not timings:
+            print(f"{module:<30} {'error':>12}  {' '.join(output)}")
+            continue
+        effects = []
+        if output:
+            effects.append(f"printed {len(output)} line(s)")
+        if created:
+            effects.append(f"created {', '.join(created)}")
+        if loaded:
+            effects.append(f"loaded {', '.join(loaded)}")
+        print(f"{module:<30} {min(timings) * 1000:>9.1f} ms  {'; '.join(effects) or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: the previous market_comparison_data pipeline (defensive .copy() calls, pandas rolling,
+iterrows() + per-row strftime, final re-sort) vs. the current one (rolling-window engine from an empty
+state, dates formatted once, column-wise serialization), on synthetic minute bars.
+
+Usage: python benchmarks/bench_market_comparison_export.py [years] [--no-memory]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+import market_comparison_data  # noqa: E402
+
+ROLLING_WINDOW = market_comparison_data.ROLLING_WINDOW
+MINUTE_DATE_FORMAT = '%Y-%m-%d %H:%M'
+
+def legacy_daily_returns(df):
+    df_returns = df.copy()
+    df_returns['daily_return'] = df_returns['close'].pct_change()
+    return df_returns[['daily_return']].dropna()
+
+def legacy_volatility(df_returns, window=ROLLING_WINDOW):
+    df_vol = df_returns.copy()
+    df_vol['volatility'] = df_vol['daily_return'].rolling(window=window).std() * (365**0.5)
+    return df_vol[['volatility']].dropna()
+
+def legacy_pipeline(df_btc_raw, df_spy_raw):
+    """The body of main() before the incremental engine: copies, pandas rolling and an iterrows() export."""
+    df_btc_returns = legacy_daily_returns(df_btc_raw.copy())
+    df_spy_returns = legacy_daily_returns(df_spy_raw.copy())
+    df_btc_vol = legacy_volatility(df_btc_returns.copy())
+    df_spy_vol = legacy_volatility(df_spy_returns.copy())
+    df_correlation = market_comparison_data.calculate_rolling_correlation(df_btc_returns, df_spy_returns)
+    df_merged_vol = pd.merge(df_btc_vol, df_spy_vol, left_index=True, right_index=True, how='inner', suffixes=['_btc', '_spy'])
+    df_merged_all = pd.merge(df_merged_vol, df_correlation, left_index=True, right_index=True, how='inner')
+    output_data = []
+    for date, row in df_merged_all.iterrows():
+        output_data.append({
+            "date": date.strftime(MINUTE_DATE_FORMAT),
+            "btc_volatility": row['volatility_btc'],
+            "spy_volatility": row['volatility_spy'],
+            "btc_spy_correlation": row['correlation']
+        })
+    output_data.sort(key=lambda x: x['date'])
+    return output_data
+
+def current_pipeline(df_btc_raw, df_spy_raw):
+    """Full computation through the incremental engine, as main() does on a first run."""
+    state = market_comparison_data.new_state(market_comparison_data.EQUITY_TICKER)
+    committed_rows, provisional_rows = market_comparison_data.update_rows(
+        state, df_btc_raw['close'], df_spy_raw['close'], pd.Timestamp("2100-01-01"))
+    return committed_rows + provisional_rows
+
+def make_minute_bars(years, seed=0):
+    """24/7 BTC minute closes and SPY minute closes during US regular trading hours (13:30-20:00 UTC, weekdays)."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2014-01-01", periods=int(years * 365 * 1440), freq="min", name="date")
+    btc = pd.DataFrame({'close': 30000 * np.exp(np.cumsum(rng.normal(0, 0.0008, len(index))))}, index=index)
+    minute_of_day = index.hour * 60 + index.minute
+    trading = (index.dayofweek < 5) & (minute_of_day >= 13 * 60 + 30) & (minute_of_day < 20 * 60)
+    spy_index = index[trading]
+    spy = pd.DataFrame({'close': 400 * np.exp(np.cumsum(rng.normal(0, 0.0003, len(spy_index))))}, index=spy_index)
+    return btc, spy
+
+def run(label, func, rows, measure_memory):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = ""
+    if measure_memory:
+        del result
+        tracemalloc.start()
+        result = func()
+        peak = f"{tracemalloc.get_traced_memory()[1] / 2**20:10,.0f} MiB peak"
+        tracemalloc.stop()
+    print(f"{label:<34} {elapsed:8.2f} s {rows / elapsed:>12,.0f} rows/s {peak}")
+    return result
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    years = float(args[0]) if args else 10
+    measure_memory = "--no-memory" not in sys.argv
+    market_comparison_data.DATE_FORMAT = MINUTE_DATE_FORMAT
+
+    df_btc, df_spy = make_minute_bars(years)
+    rows = len(df_btc) + len(df_spy)
+    print(f"{years:g} years of minute bars: {len(df_btc):,} BTC + {len(df_spy):,} SPY rows")
+
+    before = run("before: copies + iterrows export", lambda: legacy_pipeline(df_btc, df_spy), rows, measure_memory)
+    after = run("after: engine + column-wise export", lambda: current_pipeline(df_btc, df_spy), rows, measure_memory)
+
+    if [row["date"] for row in before] != [row["date"] for row in after]:
+        print("WARNING: the two pipelines produced different dates")
+    else:
+        error = max(abs(b[field] - a[field]) for b, a in zip(before, after) for field in market_comparison_data.OUTPUT_FIELDS)
+        print(f"{len(after):,} output rows, max abs difference {error:.2e}")
+
+if __name__ == "__main__":
+    main()
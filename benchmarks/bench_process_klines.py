@@ -0,0 +1,70 @@
+"""
+Benchmark: per-row process_klines (previous implementation) vs. the batched NumPy conversion.
+
+Usage: python benchmarks/bench_process_klines.py [rows]
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+import binance_kline_collector  # noqa: E402
+import kline_storage  # noqa: E402
+
+def legacy_process_klines(klines_data):
+    """The per-row implementation process_klines used before it was vectorized."""
+    processed = []
+    for kline in klines_data:
+        processed.append({
+            "open_time": kline[0],
+            "open_time_readable": datetime.fromtimestamp(kline[0]/1000).strftime('%Y-%m-%d %H:%M:%S'),
+            "open": float(kline[1]),
+            "high": float(kline[2]),
+            "low": float(kline[3]),
+            "close": float(kline[4]),
+            "volume": float(kline[5]),
+            "close_time": kline[6],
+            "close_time_readable": datetime.fromtimestamp(kline[6]/1000).strftime('%Y-%m-%d %H:%M:%S'),
+            "quote_asset_volume": float(kline[7]),
+            "number_of_trades": int(kline[8]),
+            "taker_buy_base_asset_volume": float(kline[9]),
+            "taker_buy_quote_asset_volume": float(kline[10])
+        })
+    processed.sort(key=lambda x: x['open_time'])
+    return processed
+
+def make_raw_klines(rows, start_ms=1_600_000_000_000, step_ms=60_000):
+    """Synthetic 1m klines in the shape returned by /api/v3/klines (prices as strings)."""
+    raw = []
+    for i in range(rows):
+        open_time = start_ms + i * step_ms
+        price = 30000 + (i % 5000) * 0.37
+        raw.append([open_time, f"{price:.8f}", f"{price + 12.5:.8f}", f"{price - 9.25:.8f}", f"{price + 1.75:.8f}",
+                    f"{(i % 997) * 0.113:.8f}", open_time + step_ms - 1, f"{(i % 997) * 3401.7:.8f}", i % 4096,
+                    f"{(i % 991) * 0.057:.8f}", f"{(i % 991) * 1700.3:.8f}", "0"])
+    return raw
+
+def timed(label, func, rows):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<42} {elapsed:8.3f} s {rows / elapsed:>14,.0f} rows/s")
+    return result
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    raw = make_raw_klines(rows)
+    print(f"Processing {rows:,} synthetic 1m klines")
+
+    before = timed("before: per-row process_klines", lambda: legacy_process_klines(raw), rows)
+    timed("after: klines_to_columns (typed arrays)", lambda: binance_kline_collector.klines_to_columns(raw), rows)
+    after = timed("after: process_klines (JSON records)", lambda: binance_kline_collector.process_klines(raw), rows)
+    columns = binance_kline_collector.klines_to_columns(raw)
+    timed("after: columns_to_records only", lambda: kline_storage.columns_to_records(columns), rows)
+
+    if before != after:
+        print("WARNING: vectorized output differs from the per-row implementation")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import os
 import json
+import argparse
 import requests
+import numpy as np
+import http_client
+import kline_storage
 from datetime import datetime, timedelta
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configuration
 SYMBOL = "BTCUSDT"
@@ -11,99 +15,200 @@ INTERVAL = "1d"  # 1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w, 1M
 LIMIT = 1000 
 # Data to fetch (e.g., 1 year)
 DAYS_TO_FETCH = 365
+# Concurrent requests used when paging through long histories
+MAX_WORKERS = 8
+# Symbol/interval pairs processed at the same time when collecting several pairs
+MAX_CONCURRENT_JOBS = 8
+
+# Length of each fixed-size interval in milliseconds ("1M" is calendar-based and paged sequentially)
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 3 * 60_000, "5m": 5 * 60_000, "15m": 15 * 60_000, "30m": 30 * 60_000,
+    "1h": 3_600_000, "2h": 2 * 3_600_000, "4h": 4 * 3_600_000, "6h": 6 * 3_600_000,
+    "8h": 8 * 3_600_000, "12h": 12 * 3_600_000,
+    "1d": 86_400_000, "3d": 3 * 86_400_000, "1w": 7 * 86_400_000,
+}
 
 # Output directory and file
 # The script is in 'scripts/', so OUTPUT_DIR is '../data/'
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, f"{SYMBOL.lower()}_kline_{INTERVAL}.json")
 
+# Formats written for every pair: "json" (used by the pages), "npy" (memory-mappable columns), "parquet"
+STORAGE_FORMATS = ["json"]
+
 BINANCE_API_URL = "https://api.binance.com/api/v3/klines"
 
-def fetch_klines(symbol, interval, start_time_ms, end_time_ms, limit):
+def kline_request_weight(limit):
+    """Request weight of /api/v3/klines as documented by Binance (it depends on `limit`)."""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+def fetch_kline_window(symbol, interval, start_time_ms, end_time_ms, limit):
     """
-    Fetches K-line/candlestick data from Binance.
-    Binance API returns data in batches. We might need multiple calls if the date range is large.
+    Fetches a single page of klines between start_time_ms and end_time_ms (both inclusive).
+    Rate limiting (Binance request weight) and retries are handled by http_client.
+    Raises requests.exceptions.RequestException / ValueError on failure.
     """
-    all_klines = []
-    current_start_time = start_time_ms
+    params = {
+        "symbol": symbol,
+        "interval": interval,
+        "startTime": int(start_time_ms),
+        "endTime": int(end_time_ms), # endTime is inclusive
+        "limit": limit
+    }
+    response = http_client.get(BINANCE_API_URL, params=params, weight=kline_request_weight(limit))
+    response.raise_for_status()  # Raise an exception for HTTP errors
+    return response.json()
 
+def split_time_range(start_time_ms, end_time_ms, interval_ms, limit):
+    """Splits [start_time_ms, end_time_ms] into consecutive windows of at most `limit` candles each."""
+    windows = []
+    window_ms = interval_ms * limit
+    window_start = start_time_ms
+    while window_start <= end_time_ms:
+        window_end = min(window_start + window_ms - 1, end_time_ms)
+        windows.append((window_start, window_end))
+        window_start = window_end + 1
+    return windows
+
+def fetch_klines(symbol, interval, start_time_ms, end_time_ms, limit, max_workers=MAX_WORKERS, executor=None):
+    """
+    Fetches K-line/candlestick data from Binance.
+    Binance API returns data in batches, so the time range is split into `limit`-sized windows up front
+    and the windows are fetched concurrently, throttled by the shared Binance weight budget in http_client.
+    Intervals without a fixed length ("1M") are paged one request at a time instead.
+    Pass `executor` to run the page requests on a pool shared with other fetches.
+    Returns the raw klines in open_time order, or None if any request failed.
+    """
     print(f"Fetching K-lines for {symbol} with interval {interval}")
     print(f"From: {datetime.fromtimestamp(start_time_ms/1000)} To: {datetime.fromtimestamp(end_time_ms/1000)}")
 
+    try:
+        interval_ms = INTERVAL_MS.get(interval)
+        if interval_ms is None:
+            return _fetch_klines_sequential(symbol, interval, start_time_ms, end_time_ms, limit)
+
+        windows = split_time_range(start_time_ms, end_time_ms, interval_ms, limit)
+        fetch_window = lambda w: fetch_kline_window(symbol, interval, w[0], w[1], limit)
+        if executor is not None:
+            pages = list(executor.map(fetch_window, windows))
+        else:
+            print(f"Fetching {len(windows)} windows with up to {max_workers} concurrent requests.")
+            with ThreadPoolExecutor(max_workers=max_workers) as own_executor:
+                pages = list(own_executor.map(fetch_window, windows))
+
+        # Windows do not overlap, but de-duplicate on open_time anyway in case a page spilled over.
+        klines_by_open_time = {}
+        for page in pages:
+            for kline in page:
+                klines_by_open_time[kline[0]] = kline
+        all_klines = [klines_by_open_time[t] for t in sorted(klines_by_open_time)]
+        print(f"Fetched {len(all_klines)} klines in {len(windows)} requests.")
+        return all_klines
+
+    except requests.exceptions.RequestException as e:
+        print(f"HTTP Request error: {e}")
+        return None # Or handle more gracefully
+    except json.JSONDecodeError as e:
+        print(f"JSON Decode error: {e}")
+        return None
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return None
+
+def _fetch_klines_sequential(symbol, interval, start_time_ms, end_time_ms, limit):
+    """Pages through the range one request at a time, for intervals with a variable length."""
+    all_klines = []
+    current_start_time = start_time_ms
+
     while current_start_time < end_time_ms:
-        params = {
-            "symbol": symbol,
-            "interval": interval,
-            "startTime": int(current_start_time),
-            "endTime": int(end_time_ms), # endTime is inclusive
-            "limit": limit 
-        }
+        klines = fetch_kline_window(symbol, interval, current_start_time, end_time_ms, limit)
+
+        if not klines:
+            # No more data for the period or an issue
+            print(f"No more klines received at {datetime.fromtimestamp(current_start_time/1000)}. Breaking loop.")
+            break
+
+        all_klines.extend(klines)
         
-        try:
-            response = requests.get(BINANCE_API_URL, params=params)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            klines = response.json()
-
-            if not klines:
-                # No more data for the period or an issue
-                print(f"No more klines received at {datetime.fromtimestamp(current_start_time/1000)}. Breaking loop.")
-                break
-
-            all_klines.extend(klines)
-            
-            # Binance returns Klines with the open time as the first element.
-            # The next query should start after the last Kline's open time.
-            # Add 1 to avoid fetching the same kline again if interval matches exactly
-            last_kline_open_time = klines[-1][0]
-            current_start_time = last_kline_open_time + 1 
-            
-            print(f"Fetched {len(klines)} klines. Last kline open time: {datetime.fromtimestamp(last_kline_open_time/1000)}. Next start: {datetime.fromtimestamp(current_start_time/1000)}")
-
-            # Respect Binance API rate limits - a small delay between requests
-            time.sleep(0.2) # 200ms delay
-
-        except requests.exceptions.RequestException as e:
-            print(f"HTTP Request error: {e}")
-            return None # Or handle more gracefully
-        except json.JSONDecodeError as e:
-            print(f"JSON Decode error: {e} - Response: {response.text}")
-            return None
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
-            return None
-            
+        # Binance returns Klines with the open time as the first element.
+        # The next query should start after the last Kline's open time.
+        # Add 1 to avoid fetching the same kline again if interval matches exactly
+        last_kline_open_time = klines[-1][0]
+        current_start_time = last_kline_open_time + 1 
+        
+        print(f"Fetched {len(klines)} klines. Last kline open time: {datetime.fromtimestamp(last_kline_open_time/1000)}. Next start: {datetime.fromtimestamp(current_start_time/1000)}")
+
     return all_klines
 
-def process_klines(klines_data):
+def klines_to_columns(klines_data):
     """
-    Processes raw K-line data into a more readable format.
+    Converts raw K-line data into typed NumPy columns (see kline_storage.KLINE_COLUMNS) in one batch.
     Each kline is: [open_time, open, high, low, close, volume, close_time, quote_asset_volume, number_of_trades, taker_buy_base_asset_volume, taker_buy_quote_asset_volume, ignore]
+    Rows are only sorted by open time if they are not already in order (Binance usually returns them sorted).
     """
-    processed = []
     if not klines_data:
-        return processed
-        
-    for kline in klines_data:
-        processed.append({
-            "open_time": kline[0],
-            "open_time_readable": datetime.fromtimestamp(kline[0]/1000).strftime('%Y-%m-%d %H:%M:%S'),
-            "open": float(kline[1]),
-            "high": float(kline[2]),
-            "low": float(kline[3]),
-            "close": float(kline[4]),
-            "volume": float(kline[5]),
-            "close_time": kline[6],
-            "close_time_readable": datetime.fromtimestamp(kline[6]/1000).strftime('%Y-%m-%d %H:%M:%S'),
-            "quote_asset_volume": float(kline[7]),
-            "number_of_trades": int(kline[8]),
-            "taker_buy_base_asset_volume": float(kline[9]),
-            "taker_buy_quote_asset_volume": float(kline[10])
-        })
-    # Sort by open time just in case, though Binance usually returns them sorted.
-    processed.sort(key=lambda x: x['open_time'])
-    return processed
-
-def main():
+        return {name: np.array([], dtype=dtype) for name, dtype in kline_storage.KLINE_COLUMNS.items()}
+
+    raw = np.array(klines_data, dtype=object)
+    columns = {
+        name: raw[:, i].astype(dtype)
+        for i, (name, dtype) in enumerate(kline_storage.KLINE_COLUMNS.items())
+    }
+    open_time = columns["open_time"]
+    if not np.all(open_time[1:] >= open_time[:-1]):
+        order = np.argsort(open_time, kind="stable")
+        columns = {name: values[order] for name, values in columns.items()}
+    return columns
+
+def process_klines(klines_data):
+    """
+    Processes raw K-line data into a more readable format (the dicts stored in the JSON output).
+    """
+    if not klines_data:
+        return []
+    return kline_storage.columns_to_records(klines_to_columns(klines_data))
+
+def load_existing_klines(base_path, formats=None):
+    """
+    Loads previously saved klines as typed columns, from the formats this run is about to write.
+    Returns None if nothing usable is stored so the caller can fall back to a full fetch.
+    """
+    # Prefer binary formats, they load much faster than JSON
+    formats = sorted(formats or STORAGE_FORMATS, key=lambda f: f == "json")
+    try:
+        columns = kline_storage.load_klines(base_path, formats=formats, mmap=False)
+    except (json.JSONDecodeError, OSError, ValueError, KeyError) as e:
+        print(f"Could not read existing klines from {base_path}: {e}")
+        return None
+    if columns is None or len(columns["open_time"]) == 0:
+        return None
+    return columns
+
+def merge_klines(existing, new):
+    """
+    Merges newly fetched kline columns into the existing ones, de-duplicating on open_time.
+    A new kline wins over an existing one with the same open_time, which replaces a candle
+    that was still open when it was last saved.
+    """
+    return kline_storage.merge_columns(existing, new)
+
+def _readable(time_ms):
+    return datetime.fromtimestamp(int(time_ms)/1000).strftime('%Y-%m-%d %H:%M:%S')
+
+def collect_klines(symbol, interval, incremental=False, executor=None, formats=None):
+    """
+    Fetches, processes and saves the klines of one symbol/interval pair in every storage format.
+    Returns True if data was saved.
+    """
+    formats = formats or STORAGE_FORMATS
+    base_path = kline_storage.kline_base_path(OUTPUT_DIR, symbol, interval)
+
     # Calculate start and end times
     end_datetime = datetime.utcnow()
     start_datetime = end_datetime - timedelta(days=DAYS_TO_FETCH)
@@ -112,25 +217,102 @@ def main():
     start_time_ms = int(start_datetime.timestamp() * 1000)
     end_time_ms = int(end_datetime.timestamp() * 1000)
 
-    raw_klines = fetch_klines(SYMBOL, INTERVAL, start_time_ms, end_time_ms, LIMIT)
+    existing_data = load_existing_klines(base_path, formats) if incremental else None
+    if existing_data is not None:
+        # Start at the last stored candle rather than after it: it may still have been open
+        # when it was saved, so we fetch it again and let the fresh copy replace it.
+        start_time_ms = int(existing_data['open_time'][-1])
+        print(f"[{symbol} {interval}] Incremental mode: {len(existing_data['open_time'])} klines on disk, fetching from {datetime.fromtimestamp(start_time_ms/1000)}")
+    elif incremental:
+        print(f"[{symbol} {interval}] Incremental mode: no usable data at {base_path}, doing a full fetch.")
 
-    if raw_klines is not None:
-        processed_data = process_klines(raw_klines)
-        
-        if processed_data:
-            # Ensure output directory exists
-            os.makedirs(OUTPUT_DIR, exist_ok=True)
-            
-            with open(OUTPUT_FILE, 'w') as f:
-                json.dump(processed_data, f, indent=4)
-            
-            print(f"Successfully fetched and saved {len(processed_data)} klines to {OUTPUT_FILE}")
-            if processed_data:
-                 print(f"First kline: {processed_data[0]['open_time_readable']} - Last kline: {processed_data[-1]['open_time_readable']}")
-        else:
-            print("No data processed or saved.")
+    raw_klines = fetch_klines(symbol, interval, start_time_ms, end_time_ms, LIMIT, executor=executor)
+
+    if raw_klines is None:
+        print(f"[{symbol} {interval}] Failed to fetch K-line data.")
+        return False
+
+    processed_data = klines_to_columns(raw_klines)
+    if existing_data is not None:
+        new_count = len(processed_data['open_time'])
+        processed_data = merge_klines(existing_data, processed_data)
+        print(f"[{symbol} {interval}] Merged {new_count} fetched klines into {len(existing_data['open_time'])} existing ones.")
+
+    kline_count = len(processed_data['open_time'])
+    if kline_count == 0:
+        print(f"[{symbol} {interval}] No data processed or saved.")
+        return False
+
+    # Ensure output directory exists
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    saved_paths = kline_storage.save_klines(processed_data, base_path, formats)
+
+    print(f"[{symbol} {interval}] Successfully fetched and saved {kline_count} klines to {', '.join(saved_paths)}")
+    print(f"[{symbol} {interval}] First kline: {_readable(processed_data['open_time'][0])} - Last kline: {_readable(processed_data['open_time'][-1])}")
+    return True
+
+def main(symbols=None, intervals=None, incremental=False, max_workers=MAX_WORKERS, formats=None):
+    """
+    Collects every symbol x interval pair. All pairs share one worker pool for their page
+    requests, and http_client's session and rate-limit budget, so adding pairs does not
+    multiply the request rate.
+    """
+    symbols = symbols or [SYMBOL]
+    intervals = intervals or [INTERVAL]
+    jobs = [(symbol, interval) for symbol in symbols for interval in intervals]
+    print(f"Collecting {len(jobs)} symbol/interval pairs with {max_workers} workers.")
+
+    # Jobs only wait on their page requests, which run on the shared worker pool.
+    # Keeping the two pools separate means a job can never starve its own requests.
+    with ThreadPoolExecutor(max_workers=max_workers) as worker_pool, \
+         ThreadPoolExecutor(max_workers=min(len(jobs), MAX_CONCURRENT_JOBS)) as job_pool:
+        futures = {
+            job_pool.submit(collect_klines, symbol, interval, incremental, worker_pool, formats): (symbol, interval)
+            for symbol, interval in jobs
+        }
+        failed = []
+        for future in as_completed(futures):
+            try:
+                ok = future.result()
+            except Exception as e:
+                print(f"Error collecting {' '.join(futures[future])}: {e}")
+                ok = False
+            if not ok:
+                failed.append(futures[future])
+
+    if failed:
+        print(f"Finished with {len(failed)} failed pairs: {', '.join(f'{s} {i}' for s, i in failed)}")
     else:
-        print("Failed to fetch K-line data.")
+        print(f"All {len(jobs)} pairs collected successfully.")
+
+def _split_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Fetch Binance K-line data for one or more symbol/interval pairs.")
+    parser.add_argument("--symbols", type=_split_list, default=[SYMBOL],
+                        help=f"Comma-separated symbols, e.g. BTCUSDT,ETHUSDT,SOLUSDT (default: {SYMBOL}).")
+    parser.add_argument("--intervals", type=_split_list, default=[INTERVAL],
+                        help=f"Comma-separated intervals, e.g. 1h,4h,1d (default: {INTERVAL}).")
+    parser.add_argument("--config",
+                        help='JSON file with {"symbols": [...], "intervals": [...]}; overrides --symbols/--intervals.')
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"Concurrent page requests shared by all pairs (default: {MAX_WORKERS}).")
+    parser.add_argument("--formats", type=_split_list, default=STORAGE_FORMATS,
+                        help=f"Comma-separated storage formats to write: {', '.join(kline_storage.STORAGE_BACKENDS)} (default: json).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch candles after the last one already saved and merge them into the existing file.")
+    args = parser.parse_args()
+    unknown_formats = [f for f in args.formats if f not in kline_storage.STORAGE_BACKENDS]
+    if unknown_formats:
+        parser.error(f"Unknown storage format(s): {', '.join(unknown_formats)}. Choose from {', '.join(kline_storage.STORAGE_BACKENDS)}.")
+
+    symbols, intervals = args.symbols, args.intervals
+    if args.config:
+        with open(args.config, 'r') as f:
+            config = json.load(f)
+        symbols = config.get("symbols", symbols)
+        intervals = config.get("intervals", intervals)
+
+    main(symbols=symbols, intervals=intervals, incremental=args.incremental, max_workers=args.workers, formats=args.formats)
@@ -0,0 +1,102 @@
+import os
+from datetime import datetime, timezone
+import numpy as np
+import kline_storage
+
+# --- Local cache of daily equity bars (SPY, QQQ, ...) ---
+# Bars are stored with kline_storage in the same typed-column layout as the Binance klines
+# (data/equity/spy_kline_1d.json, or .npy/.parquet), one row per trading day, open_time = UTC midnight.
+# A run only downloads the dates the cache does not cover yet, and falls back to the cache when Yahoo is unreachable.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+EQUITY_CACHE_DIR = os.path.join(SCRIPT_DIR, "..", "data", "equity")
+CACHE_FORMATS = ("json",)
+DAY_MS = 86_400_000
+# Weekends and market holidays: a cache starting this many days after the requested start still covers it
+MAX_MARKET_CLOSED_DAYS = 5
+
+def equity_base_path(ticker, cache_dir=EQUITY_CACHE_DIR):
+    return kline_storage.kline_base_path(cache_dir, ticker, "1d")
+
+def _date_ms(date):
+    """Epoch milliseconds of UTC midnight of a date / datetime / 'YYYY-MM-DD' string."""
+    if isinstance(date, str):
+        date = datetime.strptime(date, '%Y-%m-%d')
+    return int(datetime(date.year, date.month, date.day, tzinfo=timezone.utc).timestamp() * 1000)
+
+def _ms_date_str(time_ms):
+    return datetime.fromtimestamp(int(time_ms) / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+def history_to_columns(df_history):
+    """Converts a yfinance history frame into kline columns (fields Yahoo does not provide are zero)."""
+    open_time = np.array([_date_ms(d) for d in df_history.index.date], dtype=np.int64)
+    values = {
+        "open_time": open_time,
+        "open": df_history["Open"].to_numpy(dtype=np.float64),
+        "high": df_history["High"].to_numpy(dtype=np.float64),
+        "low": df_history["Low"].to_numpy(dtype=np.float64),
+        "close": df_history["Close"].to_numpy(dtype=np.float64),
+        "volume": df_history["Volume"].to_numpy(dtype=np.float64),
+        "close_time": open_time + DAY_MS - 1,
+    }
+    return {
+        name: values[name] if name in values else np.zeros(len(open_time), dtype=dtype)
+        for name, dtype in kline_storage.KLINE_COLUMNS.items()
+    }
+
+def fetch_daily_bars(ticker, start_date_str, end_date_str):
+    """Downloads daily bars [start, end) from Yahoo Finance. Returns kline columns, or None on failure."""
+    try:
+        import yfinance as yf
+        df_history = yf.Ticker(ticker).history(start=start_date_str, end=end_date_str, interval="1d")
+    except Exception as e:
+        print(f"Error fetching {ticker} data: {e}")
+        return None
+    if df_history is None or df_history.empty:
+        return None
+    return history_to_columns(df_history)
+
+def missing_ranges(cached, start_ms, end_ms):
+    """
+    Returns the [start, end) date ranges (as 'YYYY-MM-DD' strings) to download so the cache covers [start_ms, end_ms).
+    The last cached bar is fetched again, since it may have been saved before that day's close.
+    """
+    if cached is None or len(cached["open_time"]) == 0:
+        return [(_ms_date_str(start_ms), _ms_date_str(end_ms))]
+    first, last = int(cached["open_time"][0]), int(cached["open_time"][-1])
+    ranges = []
+    if start_ms < first - MAX_MARKET_CLOSED_DAYS * DAY_MS:
+        ranges.append((_ms_date_str(start_ms), _ms_date_str(first)))
+    if end_ms > last + DAY_MS:
+        ranges.append((_ms_date_str(last), _ms_date_str(end_ms)))
+    return ranges
+
+def get_daily_bars(ticker, start_date_str, end_date_str, offline=False, cache_dir=EQUITY_CACHE_DIR, formats=CACHE_FORMATS):
+    """
+    Returns the kline columns of `ticker` for [start, end), downloading only the dates missing from
+    the local cache and saving them. With offline=True (or when Yahoo fails) the cached bars are used as they are.
+    Returns None if there is neither cached nor downloaded data.
+    """
+    base_path = equity_base_path(ticker, cache_dir)
+    cached = kline_storage.load_klines(base_path, mmap=False)
+    start_ms, end_ms = _date_ms(start_date_str), _date_ms(end_date_str)
+
+    columns = cached
+    if not offline:
+        fetched_any = False
+        for range_start, range_end in missing_ranges(cached, start_ms, end_ms):
+            print(f"Fetching {ticker} daily bars {range_start} -> {range_end} from Yahoo Finance...")
+            new_columns = fetch_daily_bars(ticker, range_start, range_end)
+            if new_columns is None:
+                print(f"Could not fetch {ticker} {range_start} -> {range_end}; using cached data only.")
+                continue
+            columns = new_columns if columns is None else kline_storage.merge_columns(columns, new_columns)
+            fetched_any = True
+        if fetched_any:
+            kline_storage.save_klines(columns, base_path, formats)
+
+    if columns is None:
+        print(f"No cached or downloaded data for {ticker}.")
+        return None
+    in_range = (columns["open_time"] >= start_ms) & (columns["open_time"] < end_ms)
+    return {name: values[in_range] for name, values in columns.items()}
@@ -0,0 +1,87 @@
+import os
+import json
+
+# Append-only history files: one JSON record per line (NDJSON), sorted by the key column.
+# New rows are appended after the last stored key, so a merge only reads the file's last line
+# and writes the new rows: O(new rows), independent of how much history has built up.
+
+def history_path(directory, symbol, metric, period):
+    """Returns the history file for a symbol/metric/period, e.g. history/btcusdt_open_interest_5m.ndjson."""
+    return os.path.join(directory, f"{symbol.lower()}_{metric}_{period}.ndjson")
+
+def _read_last_line(path, chunk_size=4096):
+    """Returns the last complete line of the file (without reading the rest of it), or None."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        buffer = b""
+        position = end
+        while position > 0:
+            step = min(chunk_size, position)
+            position -= step
+            f.seek(position)
+            buffer = f.read(step) + buffer
+            lines = buffer.rstrip(b"\n").split(b"\n")
+            if len(lines) > 1 or position == 0:
+                return lines[-1].decode('utf-8') if lines[-1] else None
+    return None
+
+def truncate_partial_tail(path):
+    """Drops a trailing partial line left behind by an interrupted write."""
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        position = size
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            newline = f.read(step).rfind(b"\n")
+            if newline != -1:
+                f.truncate(position + newline + 1)
+                return
+        f.truncate(0)
+
+def last_key(path, key="timestamp"):
+    """Returns the key of the newest stored row, or None if the history is empty."""
+    if not os.path.exists(path):
+        return None
+    truncate_partial_tail(path)
+    line = _read_last_line(path)
+    if not line:
+        return None
+    return json.loads(line)[key]
+
+def append_rows(path, rows, key="timestamp"):
+    """
+    Appends the rows that are newer than the last stored one, in key order, skipping duplicates.
+    Returns the number of rows written.
+    """
+    newest = last_key(path, key)
+    by_key = {row[key]: row for row in rows if newest is None or row[key] > newest}
+    if not by_key:
+        return 0
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'a') as f:
+        for k in sorted(by_key):
+            f.write(json.dumps(by_key[k], separators=(",", ":")) + "\n")
+    return len(by_key)
+
+def load_history(path, since=None, key="timestamp"):
+    """Reads the stored rows, optionally only those with key >= since."""
+    if not os.path.exists(path):
+        return []
+    rows = []
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break  # partial line from an interrupted write
+            row = json.loads(line)
+            if since is None or row[key] >= since:
+                rows.append(row)
+    return rows
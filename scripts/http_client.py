@@ -0,0 +1,153 @@
+import time
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- Configuration shared by every collector ---
+# (connect, read) timeouts in seconds, so one hung socket cannot stall a whole job
+DEFAULT_TIMEOUT = (5, 30)
+# Keep-alive connections kept open per host; should be >= the largest worker pool using the client
+POOL_MAXSIZE = 32
+MAX_RETRIES = 3
+# Exponential backoff between retries: BACKOFF_BASE * 2**attempt seconds
+BACKOFF_BASE = 1.0
+# Used on 429/418 responses that do not carry a Retry-After header
+DEFAULT_RETRY_AFTER = 60
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+RATE_LIMIT_STATUS_CODES = {418, 429}
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `capacity` tokens refilled evenly over `per_seconds`.
+    If `used_weight_header` is set, the bucket is re-synced after every response from that header,
+    which the API uses to report how much of the current budget has been spent
+    (Binance: X-MBX-USED-WEIGHT-1M).
+    """
+
+    def __init__(self, capacity, per_seconds=60.0, used_weight_header=None):
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.refill_rate = capacity / per_seconds
+        self.used_weight_header = used_weight_header
+        self.paused_until = 0.0
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+
+    def acquire(self, weight=1):
+        """Blocks until `weight` tokens are available, then takes them."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = max(self.paused_until - now, (weight - self.tokens) / self.refill_rate)
+            time.sleep(wait)
+
+    def update_from_headers(self, headers):
+        """Lowers the available tokens to what the server says is left of the current budget."""
+        if not self.used_weight_header:
+            return
+        used = headers.get(self.used_weight_header)
+        if used is None:
+            return
+        try:
+            used = int(used)
+        except ValueError:
+            return
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, float(self.capacity - used))
+
+    def pause(self, seconds):
+        """Stops all callers for `seconds` (used on HTTP 429/418 with Retry-After)."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+# Per-host budgets. Binance weights are kept below the documented limits (6000 spot, 2400 futures per minute).
+HOST_RATE_LIMITS = {
+    "api.binance.com": TokenBucket(5000, 60, used_weight_header="X-MBX-USED-WEIGHT-1M"),
+    "fapi.binance.com": TokenBucket(2000, 60, used_weight_header="X-MBX-USED-WEIGHT-1M"),
+    # Shared by all news feeds paged concurrently; well under CryptoCompare's free-tier per-second limit
+    "min-api.cryptocompare.com": TokenBucket(5, 1),
+}
+# Requests per second for hosts not listed above
+DEFAULT_HOST_RATE = 10
+
+_session = None
+_lock = threading.Lock()
+
+def get_session():
+    """Returns the process-wide keep-alive session (created on first use)."""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept-Encoding": "gzip, deflate", "Accept": "application/json"})
+            _session = session
+        return _session
+
+def get_rate_limiter(url):
+    """Returns the token bucket for the host of `url`, creating a default one for unknown hosts."""
+    host = urlparse(url).hostname
+    with _lock:
+        if host not in HOST_RATE_LIMITS:
+            HOST_RATE_LIMITS[host] = TokenBucket(DEFAULT_HOST_RATE, 1)
+        return HOST_RATE_LIMITS[host]
+
+def get(url, params=None, weight=1, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES, retry_rate_limited=True, **kwargs):
+    """
+    GET through the shared session with per-host rate limiting and the common retry policy:
+    - 429/418: pause every caller of that host for Retry-After seconds, then retry
+      (with retry_rate_limited=False the response is returned at once, for callers with their own backoff)
+    - 5xx, connection errors and timeouts: exponential backoff, then retry
+    Returns the final response (callers still call raise_for_status()).
+    Raises requests.exceptions.RequestException if the last attempt fails without a response.
+    """
+    limiter = get_rate_limiter(url)
+    session = get_session()
+    for attempt in range(max_retries + 1):
+        last_attempt = attempt == max_retries
+        limiter.acquire(weight)
+        try:
+            response = session.get(url, params=params, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if last_attempt:
+                raise
+            delay = BACKOFF_BASE * 2 ** attempt
+            print(f"Request to {url} failed ({e}). Retrying in {delay:.0f} seconds...")
+            time.sleep(delay)
+            continue
+
+        limiter.update_from_headers(response.headers)
+        if last_attempt:
+            return response
+        if response.status_code in RATE_LIMIT_STATUS_CODES:
+            if not retry_rate_limited:
+                return response
+            retry_after = _retry_after_seconds(response)
+            print(f"Rate limited by {urlparse(url).hostname} (HTTP {response.status_code}). Pausing for {retry_after} seconds...")
+            limiter.pause(retry_after)
+            continue
+        if response.status_code in RETRY_STATUS_CODES:
+            delay = BACKOFF_BASE * 2 ** attempt
+            print(f"HTTP {response.status_code} from {url}. Retrying in {delay:.0f} seconds...")
+            time.sleep(delay)
+            continue
+        return response
+
+def _retry_after_seconds(response):
+    try:
+        return int(response.headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
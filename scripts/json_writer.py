@@ -0,0 +1,87 @@
+import os
+import json
+import gzip
+import tempfile
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# --- Defaults for every data file written by the collectors ---
+# Compact output (no indentation, no spaces after separators) is several times smaller than indent=4.
+COMPACT = True
+# Pre-compressed siblings written next to each file ("gz" -> file.json.gz, "br" -> file.json.br),
+# for web servers that serve them directly (e.g. nginx gzip_static / brotli_static).
+# Set from the environment for a whole run, e.g. JSON_WRITER_COMPRESS=gz,br python scripts/refresh.py
+COMPRESS = tuple(encoding.strip() for encoding in os.environ.get("JSON_WRITER_COMPRESS", "").split(",") if encoding.strip())
+
+# mkstemp creates owner-only (0600) files; data files get the usual umask-derived mode instead,
+# so a web server running as another user can read them. os.umask can only be read by setting it,
+# so this is done once at import rather than from the collector threads.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+def dumps(data, compact=None, ensure_ascii=True):
+    """
+    Serializes `data` to UTF-8 JSON bytes (compact=None uses COMPACT).
+    Uses orjson for compact output when it is installed; indented output always uses the standard
+    library so the layout stays the familiar indent=4.
+    """
+    if compact is None:
+        compact = COMPACT
+    if compact and orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    if compact:
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=ensure_ascii).encode("utf-8")
+    return json.dumps(data, indent=4, ensure_ascii=ensure_ascii).encode("utf-8")
+
+def _atomic_write_bytes(path, payload):
+    """Writes to a temporary file in the same directory, then renames it over `path`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            if hasattr(os, "fchmod"):  # not available on Windows before Python 3.13
+                os.fchmod(f.fileno(), FILE_MODE)
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def write_json(data, path, compact=None, compress=None, ensure_ascii=True):
+    """
+    Atomically writes `data` as JSON to `path`, so readers never see a half-written file.
+    Also writes the requested pre-compressed siblings ("gz", "br"). compact/compress default to
+    COMPACT/COMPRESS as they are at call time. Returns the written paths.
+    """
+    if compress is None:
+        compress = COMPRESS
+    payload = dumps(data, compact=compact, ensure_ascii=ensure_ascii)
+    _atomic_write_bytes(path, payload)
+    written = [path]
+    for encoding in compress:
+        if encoding == "gz":
+            _atomic_write_bytes(f"{path}.gz", gzip.compress(payload, compresslevel=9, mtime=0))
+        elif encoding == "br":
+            if brotli is None:
+                print(f"Skipping {path}.br: the brotli package is not installed.")
+                continue
+            _atomic_write_bytes(f"{path}.br", brotli.compress(payload))
+        else:
+            raise ValueError(f"Unknown compression '{encoding}'. Choose from gz, br.")
+        written.append(f"{path}.{encoding}")
+    return written
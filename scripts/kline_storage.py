@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import tempfile
+import numpy as np
+import json_writer
+
+# Typed columns of a processed kline. Times are epoch milliseconds.
+KLINE_COLUMNS = {
+    "open_time": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+    "close_time": np.int64,
+    "quote_asset_volume": np.float64,
+    "number_of_trades": np.int64,
+    "taker_buy_base_asset_volume": np.float64,
+    "taker_buy_quote_asset_volume": np.float64,
+}
+
+# --- Conversions between the JSON record layout and typed columns ---
+def records_to_columns(records):
+    """Converts a list of processed kline dicts into a dict of typed NumPy arrays."""
+    return {
+        name: np.array([r[name] for r in records], dtype=dtype)
+        for name, dtype in KLINE_COLUMNS.items()
+    }
+
+def format_local_timestamps(times_ms):
+    """
+    Formats epoch-millisecond times as local '%Y-%m-%d %H:%M:%S' strings in one vectorized pass.
+    Matches datetime.fromtimestamp(t/1000).strftime(...) but only asks the OS for the UTC offset
+    once per distinct hour instead of once per row.
+    """
+    times_ms = np.asarray(times_ms, dtype=np.int64)
+    if times_ms.size == 0:
+        return np.array([], dtype='U19')
+    hours, hour_index = np.unique(times_ms // 3_600_000, return_inverse=True)
+    offsets_ms = np.array([time.localtime(int(h) * 3600).tm_gmtoff * 1000 for h in hours], dtype=np.int64)
+    local = (times_ms + offsets_ms[hour_index]).astype('datetime64[ms]')
+    return np.char.replace(np.datetime_as_string(local, unit='s'), 'T', ' ')
+
+def columns_to_records(columns):
+    """
+    Converts typed kline columns back into the processed kline dicts written to JSON,
+    including the two readable timestamps (which only the JSON layout carries).
+    """
+    names = list(KLINE_COLUMNS)
+    keys = names[:1] + ["open_time_readable"] + names[1:7] + ["close_time_readable"] + names[7:]
+    values = [columns[name].tolist() for name in names]
+    open_readable = format_local_timestamps(columns["open_time"]).tolist()
+    close_readable = format_local_timestamps(columns["close_time"]).tolist()
+    rows = zip(values[0], open_readable, *values[1:7], close_readable, *values[7:])
+    return [dict(zip(keys, row)) for row in rows]
+
+def merge_columns(existing, new):
+    """
+    Merges two sets of kline columns, de-duplicating on open_time and sorting by it.
+    A row from `new` wins over a row from `existing` with the same open_time.
+    """
+    combined = {name: np.concatenate([existing[name], new[name]]) for name in KLINE_COLUMNS}
+    # np.unique keeps the first occurrence, so look at the rows back to front to keep the newest copy.
+    reversed_open_time = combined["open_time"][::-1]
+    _, first_in_reversed = np.unique(reversed_open_time, return_index=True)
+    keep = len(reversed_open_time) - 1 - first_in_reversed
+    return {name: values[keep] for name, values in combined.items()}
+
+# --- Backends ---
+# Every backend is keyed by name and works on a base path without extension,
+# e.g. data/btcusdt_kline_1d -> data/btcusdt_kline_1d.json / data/btcusdt_kline_1d/ / ...parquet
+
+def save_json(columns, base_path):
+    path = f"{base_path}.json"
+    json_writer.write_json(columns_to_records(columns), path)
+    return path
+
+def load_json(base_path):
+    with open(f"{base_path}.json", 'r') as f:
+        return records_to_columns(json.load(f))
+
+def save_npy(columns, base_path):
+    """
+    Writes one .npy file per column into the directory `base_path`. Every column is written to a
+    temporary file first and the files are only renamed into place once all of them are on disk,
+    so a reader memory-mapping the directory never sees a half-written column.
+    """
+    os.makedirs(base_path, exist_ok=True)
+    pending = []
+    try:
+        for name, dtype in KLINE_COLUMNS.items():
+            fd, tmp_path = tempfile.mkstemp(dir=base_path, prefix=".tmp-", suffix=f"{name}.npy")
+            pending.append((tmp_path, os.path.join(base_path, f"{name}.npy")))
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.asarray(columns[name], dtype=dtype))
+                f.flush()
+                if hasattr(os, "fchmod"):
+                    os.fchmod(f.fileno(), json_writer.FILE_MODE)
+                os.fsync(f.fileno())
+        for tmp_path, path in pending:
+            os.replace(tmp_path, path)
+    except BaseException:
+        for tmp_path, _ in pending:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        raise
+    return base_path
+
+def load_npy(base_path, mmap=True):
+    """Loads the per-column .npy files. With mmap=True the arrays are memory-mapped read-only."""
+    mmap_mode = 'r' if mmap else None
+    return {
+        name: np.load(os.path.join(base_path, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in KLINE_COLUMNS
+    }
+
+def save_parquet(columns, base_path):
+    """Writes a Parquet file. Requires pandas and pyarrow (or fastparquet)."""
+    import pandas as pd
+    path = f"{base_path}.parquet"
+    pd.DataFrame({name: columns[name] for name in KLINE_COLUMNS}).to_parquet(path, index=False)
+    return path
+
+def load_parquet(base_path):
+    import pandas as pd
+    df = pd.read_parquet(f"{base_path}.parquet", columns=list(KLINE_COLUMNS))
+    return {name: df[name].to_numpy(dtype=dtype) for name, dtype in KLINE_COLUMNS.items()}
+
+STORAGE_BACKENDS = {
+    "json": (save_json, load_json),
+    "npy": (save_npy, load_npy),
+    "parquet": (save_parquet, load_parquet),
+}
+
+def kline_base_path(directory, symbol, interval):
+    """Returns the extension-less path shared by all backends, e.g. data/btcusdt_kline_1d."""
+    return os.path.join(directory, f"{symbol.lower()}_kline_{interval}")
+
+def _format_paths(base_path, storage_format):
+    if storage_format == "npy":
+        return [os.path.join(base_path, f"{name}.npy") for name in KLINE_COLUMNS]
+    return [f"{base_path}.{storage_format}"]
+
+def exists(base_path, storage_format):
+    """Returns True if data for `base_path` has been written in `storage_format`."""
+    if storage_format == "npy":
+        return os.path.exists(os.path.join(base_path, "open_time.npy"))
+    return os.path.exists(f"{base_path}.{storage_format}")
+
+def modified_time(base_path, storage_format):
+    """When `storage_format` was last written for `base_path` (the oldest of its files), or None if it does not exist."""
+    try:
+        return min(os.path.getmtime(path) for path in _format_paths(base_path, storage_format))
+    except OSError:
+        return None
+
+def newest_format(base_path, formats=("npy", "parquet", "json")):
+    """
+    The format of `formats` most recently written for `base_path`, or None if none exists.
+    A copy in a format the last run did not write is older and is not used; on equal times
+    the earlier format in `formats` wins.
+    """
+    written = [(modified_time(base_path, storage_format), -order, storage_format)
+               for order, storage_format in enumerate(formats) if exists(base_path, storage_format)]
+    written = [entry for entry in written if entry[0] is not None]
+    return max(written)[2] if written else None
+
+def save_klines(columns, base_path, formats=("json",)):
+    """Saves typed kline columns in every requested format. Returns the written paths."""
+    paths = []
+    for storage_format in formats:
+        if storage_format not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage format '{storage_format}'. Choose from {', '.join(STORAGE_BACKENDS)}.")
+        save, _ = STORAGE_BACKENDS[storage_format]
+        paths.append(save(columns, base_path))
+    return paths
+
+def load_klines(base_path, formats=("npy", "parquet", "json"), mmap=True):
+    """
+    Loads kline columns from the most recently written format on disk (see newest_format), so a stale
+    copy left by an earlier run with other --formats is never read; binary formats win ties.
+    Pass mmap=False when the same files are about to be overwritten.
+    Returns None if no format exists.
+    """
+    storage_format = newest_format(base_path, formats)
+    if storage_format is None:
+        return None
+    if storage_format == "npy":
+        return load_npy(base_path, mmap=mmap)
+    _, load = STORAGE_BACKENDS[storage_format]
+    return load(base_path)
@@ -1,8 +1,15 @@
 import json
-import pandas as pd
-import yfinance as yf
+import argparse
+import numpy as np
 from datetime import datetime, timedelta
 import os
+import kline_storage
+import json_writer
+import equity_price_cache
+import rolling_stats
+
+# pandas is imported inside the functions that use it, so importing this module stays cheap;
+# yfinance is only imported by equity_price_cache when a download is needed.
 
 # Get the directory of the current script
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -10,12 +17,40 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(SCRIPT_DIR, "..", "data")
 # Construct the full path to the BTC kline file
 BTC_KLINE_FILE = os.path.join(DATA_DIR, "btcusdt_kline_1d.json")
+# Columnar copy written by `binance_kline_collector.py --formats json,npy`; preferred when present
+BTC_KLINE_NPY_DIR = os.path.join(DATA_DIR, "btcusdt_kline_1d")
 OUTPUT_FILE = os.path.join(DATA_DIR, "volatility_comparison.json")
+# Rolling-window state used to append new rows to OUTPUT_FILE instead of recomputing the whole history
+STATE_FILE = os.path.join(DATA_DIR, "volatility_comparison_state.json")
+OUTPUT_FIELDS = ["btc_volatility", "spy_volatility", "btc_spy_correlation"]
+# Format of the output "date" field (and of the dates stored in the state); must sort chronologically as text
+DATE_FORMAT = '%Y-%m-%d'
+# Rows serialized per vectorized chunk when building the output records
+EXPORT_CHUNK_ROWS = 100_000
 
 ROLLING_WINDOW = 30
+# Multi-asset mode (--matrix): every pair of these assets, aligned on the dates all of them traded
+MATRIX_CRYPTO_SYMBOLS = ["BTCUSDT"]  # daily klines in data/ written by binance_kline_collector.py
+MATRIX_EQUITY_TICKERS = ["SPY"]
+MATRIX_DAYS = 365  # history used when no crypto klines set the date range
+MATRIX_OUTPUT_FILE = os.path.join(DATA_DIR, "asset_correlation_matrix.json")
+# Decimals kept in the matrix output; plenty for charting and keeps the file compact
+MATRIX_DECIMALS = 4
+# Equity benchmark; daily bars are read from the local cache in data/equity/ (see equity_price_cache.py)
+EQUITY_TICKER = "SPY"
 
-def load_btc_data(file_path):
-    """Loads BTC kline data from a JSON file."""
+def load_btc_data(file_path, npy_dir=None):
+    """
+    Loads BTC kline data. Memory-maps the columnar .npy copy from `npy_dir` if it exists and is at least
+    as recent as the JSON file, otherwise parses the JSON file.
+    """
+    import pandas as pd
+    npy_time = kline_storage.modified_time(npy_dir, "npy") if npy_dir else None
+    if npy_time is not None and (not os.path.exists(file_path) or npy_time >= os.path.getmtime(file_path)):
+        columns = kline_storage.load_npy(npy_dir)
+        df = pd.DataFrame({'close': columns['close']},
+                          index=pd.to_datetime(columns['open_time'], unit='ms').rename('date'))
+        return df
     try:
         with open(file_path, 'r') as f:
             data = json.load(f)
@@ -31,38 +66,37 @@ def load_btc_data(file_path):
         print(f"Error loading BTC data: {e}")
         return None
 
-def fetch_spy_data(start_date_str, end_date_str):
-    """Fetches SPY daily data from Yahoo Finance."""
-    try:
-        spy = yf.Ticker("SPY")
-        # Adding a buffer for rolling calculation
-        start_date_dt = datetime.strptime(start_date_str, '%Y-%m-%d') - timedelta(days=ROLLING_WINDOW + 10) # Increased buffer slightly for correlation
-        
-        df_spy = spy.history(start=start_date_dt.strftime('%Y-%m-%d'), end=end_date_str, interval="1d")
-        df_spy.index = pd.to_datetime(df_spy.index.date) # Normalize index to date (remove time part)
-        return df_spy[['Close']].rename(columns={'Close': 'close'})
-    except Exception as e:
-        print(f"Error fetching SPY data: {e}")
+def fetch_spy_data(start_date_str, end_date_str, ticker=EQUITY_TICKER, offline=False):
+    """
+    Returns SPY (or `ticker`) daily closes from the local equity cache, downloading only the dates
+    the cache is missing from Yahoo Finance (nothing at all with offline=True).
+    """
+    import pandas as pd
+    # Adding a buffer for rolling calculation
+    start_date_dt = datetime.strptime(start_date_str, '%Y-%m-%d') - timedelta(days=ROLLING_WINDOW + 10) # Increased buffer slightly for correlation
+    columns = equity_price_cache.get_daily_bars(ticker, start_date_dt.strftime('%Y-%m-%d'), end_date_str, offline=offline)
+    if columns is None or len(columns['open_time']) == 0:
+        print(f"Error: no {ticker} data available.")
         return None
+    return pd.DataFrame({'close': columns['close']},
+                        index=pd.to_datetime(columns['open_time'], unit='ms').rename('date'))
 
 def calculate_daily_returns(df):
     """Calculates daily returns."""
     if df is None or 'close' not in df.columns:
         return None
-    df_returns = df.copy()
-    df_returns['daily_return'] = df_returns['close'].pct_change()
-    return df_returns[['daily_return']].dropna()
+    return df['close'].pct_change().dropna().to_frame('daily_return')
 
 def calculate_volatility(df_returns, window=ROLLING_WINDOW):
     """Calculates rolling volatility from daily returns."""
     if df_returns is None or 'daily_return' not in df_returns.columns:
         return None
-    df_vol = df_returns.copy()
-    df_vol['volatility'] = df_vol['daily_return'].rolling(window=window).std() * (365**0.5) # Annualized volatility
-    return df_vol[['volatility']].dropna()
+    volatility = df_returns['daily_return'].rolling(window=window).std() * (365**0.5) # Annualized volatility
+    return volatility.dropna().to_frame('volatility')
 
 def calculate_rolling_correlation(df_returns1, df_returns2, window=ROLLING_WINDOW):
     """Calculates rolling correlation between two series of daily returns."""
+    import pandas as pd
     if df_returns1 is None or df_returns2 is None or \
        'daily_return' not in df_returns1.columns or 'daily_return' not in df_returns2.columns:
         return pd.DataFrame(columns=['correlation']) # Ensure 'correlation' column exists
@@ -87,91 +121,286 @@ def calculate_rolling_correlation(df_returns1, df_returns2, window=ROLLING_WINDO
     
     return df_corr
 
-def main():
-    """Main function to process data and save output."""
-    df_btc_raw = load_btc_data(BTC_KLINE_FILE)
-    if df_btc_raw is None:
-        return
+def load_crypto_closes(symbol, data_dir=DATA_DIR):
+    """Daily closes of a Binance symbol from its stored 1d klines (any storage format), or None."""
+    import pandas as pd
+    columns = kline_storage.load_klines(kline_storage.kline_base_path(data_dir, symbol, "1d"))
+    if columns is None:
+        print(f"Error: no 1d klines stored for {symbol} in {data_dir}.")
+        return None
+    index = pd.to_datetime(columns['open_time'], unit='ms').normalize().rename('date')
+    return pd.Series(np.asarray(columns['close']), index=index, name=symbol)
 
-    if df_btc_raw.index.min() is pd.NaT or df_btc_raw.index.max() is pd.NaT:
-        print("Error: BTC data has invalid date index.")
-        return
-        
-    btc_min_date_for_spy = df_btc_raw.index.min() - timedelta(days=ROLLING_WINDOW + 10) # Adjusted buffer
-    start_date_str = btc_min_date_for_spy.strftime('%Y-%m-%d')
-    end_date_str = (df_btc_raw.index.max() + timedelta(days=1)).strftime('%Y-%m-%d')
+def load_asset_returns(crypto_symbols, equity_tickers, offline=False):
+    """
+    Loads every asset's daily closes and returns its daily returns on its own calendar (crypto every day,
+    equities on trading days), as a list of Series in asset order. Returns None if an asset has no data.
+    """
+    import pandas as pd
+    closes = []
+    for symbol in crypto_symbols:
+        series = load_crypto_closes(symbol)
+        if series is None:
+            return None
+        closes.append(series)
 
-    df_spy_raw = fetch_spy_data(start_date_str, end_date_str)
-    if df_spy_raw is None:
-        return
+    if closes:
+        start_date = min(series.index.min() for series in closes)
+        end_date = max(series.index.max() for series in closes) + timedelta(days=1)
+    else:
+        end_date = pd.Timestamp(datetime.utcnow().date()) + timedelta(days=1)
+        start_date = end_date - timedelta(days=MATRIX_DAYS)
+    for ticker in equity_tickers:
+        columns = equity_price_cache.get_daily_bars(ticker, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'), offline=offline)
+        if columns is None:
+            return None
+        closes.append(pd.Series(columns['close'], index=pd.to_datetime(columns['open_time'], unit='ms').rename('date'), name=ticker))
+
+    return [series.sort_index().pct_change().iloc[1:].dropna() for series in closes]
+
+def build_correlation_matrix(crypto_symbols, equity_tickers, window=ROLLING_WINDOW, offline=False):
+    """
+    Computes the rolling volatility of every asset and the rolling correlation of every pair.
+    As in main(), returns are taken on each asset's own calendar: volatility uses all of an asset's returns,
+    correlation uses the returns of the dates all assets share (one pass over the aligned T x N matrix).
+    Returns the compact columnar output: dates, per-asset volatility and per-pair ("A|B") correlation arrays.
+    """
+    import pandas as pd
+    asset_returns = load_asset_returns(crypto_symbols, equity_tickers, offline=offline)
+    if asset_returns is None:
+        return None
+    returns = pd.concat(asset_returns, axis=1, join='inner').sort_index()
+    if len(returns) < window:
+        print(f"Error: only {len(returns)} aligned return rows, fewer than the {window}-day window.")
+        return None
+
+    assets = list(returns.columns)
+    _, correlation = rolling_stats.rolling_volatility_correlation(returns.to_numpy(), window)
+    dates = returns.index[window - 1:]
+    volatility = {}
+    for series in asset_returns:
+        own_volatility, _ = rolling_stats.rolling_volatility_correlation(series.to_numpy()[:, None], window)
+        volatility[series.name] = pd.Series(own_volatility[:, 0], index=series.index[window - 1:]).reindex(dates).to_numpy()
 
-    # Calculate daily returns first
-    df_btc_returns = calculate_daily_returns(df_btc_raw.copy())
-    df_spy_returns = calculate_daily_returns(df_spy_raw.copy())
+    def to_list(values):
+        values = np.round(values, MATRIX_DECIMALS).astype(object)
+        values[pd.isna(values)] = None
+        return values.tolist()
 
-    if df_btc_returns is None or df_spy_returns is None:
-        print("Error calculating daily returns for BTC or SPY.")
+    return {
+        "window": window,
+        "assets": assets,
+        "dates": dates.strftime('%Y-%m-%d').tolist(),
+        "volatility": {asset: to_list(volatility[asset]) for asset in assets},
+        "correlation": {f"{assets[i]}|{assets[j]}": to_list(correlation[:, i, j])
+                        for i, j in rolling_stats.upper_triangle_pairs(assets)},
+    }
+
+def main_matrix(crypto_symbols=None, equity_tickers=None, window=ROLLING_WINDOW, offline=False):
+    """Multi-asset mode: writes the rolling volatility / correlation matrix to MATRIX_OUTPUT_FILE."""
+    crypto_symbols = MATRIX_CRYPTO_SYMBOLS if crypto_symbols is None else crypto_symbols
+    equity_tickers = MATRIX_EQUITY_TICKERS if equity_tickers is None else equity_tickers
+    output = build_correlation_matrix(crypto_symbols, equity_tickers, window=window, offline=offline)
+    if output is None:
         return
+    try:
+        json_writer.write_json(output, MATRIX_OUTPUT_FILE)
+        print(f"Saved {len(output['assets'])}-asset volatility and correlation matrix "
+              f"({len(output['dates'])} dates) to {MATRIX_OUTPUT_FILE}")
+    except Exception as e:
+        print(f"Error saving output file: {e}")
+
+# --- Incremental updates of OUTPUT_FILE ---
+# The state keeps, per series (and for the BTC/SPY pair), the last window - 1 returns plus the values
+# that are not in the output yet because the other series has no row for that date so far. A run only
+# computes returns, volatility and correlation for the bars after the stored ones and appends those rows.
+# Bars of the current (UTC) day may still change, so their rows are written but never committed to the state.
+
+def load_json(path):
+    """Reads a JSON file; returns None if it is missing or unreadable."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Could not read {path}: {e}")
+        return None
+
+def new_state(ticker, window=ROLLING_WINDOW):
+    return {
+        "window": window,
+        "ticker": ticker,
+        "output_last_date": None,
+        "series": {"btc": {}, "spy": {}, "btc_spy": {}},
+        "pending": {field: {} for field in OUTPUT_FIELDS},
+    }
+
+def returns_after(closes, after_date):
+    """
+    Daily returns of the `closes` Series dated after `after_date` (all of them if None).
+    Only the tail from the last close on or before `after_date` is read.
+    """
+    import pandas as pd
+    if after_date is not None:
+        position = closes.index.searchsorted(pd.Timestamp(after_date), side='right') - 1
+        closes = closes.iloc[max(position, 0):]
+    return closes.pct_change().iloc[1:].dropna()
+
+def update_window(entry, returns, today, window_size=ROLLING_WINDOW):
+    """
+    Runs the new returns (DataFrame, one column per series) through the entry's `window_size`-day rolling window.
+    Rows before `today` are committed to `entry`; today's row is computed on a copy of the window.
+    Returns ((dates, volatility, correlation) of the committed rows, the same for the provisional rows).
+    """
+    window = rolling_stats.RollingWindow.from_state(entry.get("window_state"), window_size, returns.shape[1])
+    final = returns[returns.index < today]
+    still_open = returns[returns.index >= today]
+    committed = (final.index, *window.extend(final.to_numpy()))
+    provisional = (still_open.index, *window.copy().extend(still_open.to_numpy()))
+    entry["window_state"] = window.to_state()
+    if len(final):
+        entry["last_date"] = final.index[-1].strftime(DATE_FORMAT)
+    return committed, provisional
+
+def format_dates(index):
+    """
+    Formats a DatetimeIndex with DATE_FORMAT. The ISO day/minute/second layouts go through NumPy's
+    datetime_as_string, which is an order of magnitude faster than strftime on long indexes.
+    """
+    unit = {'%Y-%m-%d': 'D', '%Y-%m-%d %H:%M': 'm', '%Y-%m-%d %H:%M:%S': 's'}.get(DATE_FORMAT)
+    if unit is None or len(index) == 0:
+        return index.strftime(DATE_FORMAT).tolist()
+    strings = np.datetime_as_string(index.to_numpy(dtype='datetime64[ns]'), unit=unit)
+    return (strings if unit == 'D' else np.char.replace(strings, 'T', ' ')).tolist()
+
+def frame_to_records(frame, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Serializes a date-indexed frame column by column into the output rows, formatting the dates in one
+    vectorized pass per chunk of rows (chunking bounds the temporary arrays on very long frames).
+    """
+    keys = ["date"] + list(frame.columns)
+    records = []
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows]
+        columns = [format_dates(chunk.index)] + [chunk[name].tolist() for name in chunk.columns]
+        records.extend(dict(zip(keys, row)) for row in zip(*columns))
+    return records
+
+def update_rows(state, btc_closes, spy_closes, today):
+    """
+    Advances the state with the new bars. Returns (committed_rows, provisional_rows) for the output file;
+    committed rows are final, provisional rows (today's bars) are recomputed by the next run.
+    """
+    import pandas as pd
+    series = state["series"]
+    pair_after = series["btc_spy"].get("last_date")
+    inputs = {
+        "btc_volatility": (series["btc"], lambda: returns_after(btc_closes, series["btc"].get("last_date")).to_frame()),
+        "spy_volatility": (series["spy"], lambda: returns_after(spy_closes, series["spy"].get("last_date")).to_frame()),
+        "btc_spy_correlation": (series["btc_spy"], lambda: pd.concat(
+            [returns_after(btc_closes, pair_after), returns_after(spy_closes, pair_after)], axis=1, join='inner')),
+    }
+
+    def values(result, field):
+        dates, volatility, correlation = result
+        column = correlation[:, 0, 1] if field == "btc_spy_correlation" else volatility[:, 0]
+        return pd.Series(column, index=dates, dtype=np.float64).dropna()
+
+    # One series at a time, keeping only the output column, so the intermediate arrays are freed early
+    committed, provisional = {}, {}
+    for field, (entry, load_returns) in inputs.items():
+        committed_result, open_result = update_window(entry, load_returns(), today, state["window"])
+        stored = state["pending"][field]
+        stored = pd.Series(list(stored.values()), index=pd.to_datetime(list(stored), format=DATE_FORMAT), dtype=np.float64)
+        committed[field] = pd.concat([stored, values(committed_result, field)])
+        provisional[field] = values(open_result, field)
+        del committed_result, open_result
+
+    # A row is written once all three values exist for its date (the inner merge of the full computation)
+    committed_frame = pd.concat(committed, axis=1, join='inner').sort_index()
+    if len(committed_frame):
+        state["output_last_date"] = committed_frame.index[-1].strftime(DATE_FORMAT)
+    last_date = pd.Timestamp.min if state["output_last_date"] is None else pd.to_datetime(state["output_last_date"], format=DATE_FORMAT)
+    pending = {field: values[values.index > last_date] for field, values in committed.items()}
+    state["pending"] = {field: dict(zip(format_dates(values.index), values.tolist())) for field, values in pending.items()}
 
-    # Calculate volatility from returns
-    df_btc_vol = calculate_volatility(df_btc_returns.copy())
-    df_spy_vol = calculate_volatility(df_spy_returns.copy())
+    provisional_frame = pd.concat({field: pd.concat([pending[field], provisional[field]]) for field in OUTPUT_FIELDS},
+                                  axis=1, join='inner').sort_index()
+    provisional_frame = provisional_frame[provisional_frame.index > last_date]
+    del committed, pending, provisional
+    return frame_to_records(committed_frame), frame_to_records(provisional_frame)
 
-    if df_btc_vol is None or df_spy_vol is None:
-        print("Error calculating volatility for BTC or SPY.")
+def main(offline=False, full=False, window=ROLLING_WINDOW):
+    """
+    Main function to process data and save output, with a `window`-day rolling window.
+    With full=True the stored state is discarded and everything is recomputed.
+    """
+    import pandas as pd
+    df_btc_raw = load_btc_data(BTC_KLINE_FILE, BTC_KLINE_NPY_DIR)
+    if df_btc_raw is None:
         return
 
-    # Calculate rolling correlation from returns
-    df_correlation = calculate_rolling_correlation(df_btc_returns, df_spy_returns)
-    if df_correlation is None:
-        print("Error calculating rolling correlation.")
-        # We might want to proceed without correlation if it fails, or stop. For now, let's stop.
+    if df_btc_raw.index.min() is pd.NaT or df_btc_raw.index.max() is pd.NaT:
+        print("Error: BTC data has invalid date index.")
         return
 
-    # Merge volatility data
-    df_merged_vol = pd.merge(df_btc_vol, df_spy_vol, left_index=True, right_index=True, how='inner', suffixes=['_btc', '_spy'])
-    
-    # Merge correlation data with volatility data
-    # Both df_merged_vol and df_correlation are indexed by date
-    df_merged_all = pd.merge(df_merged_vol, df_correlation, left_index=True, right_index=True, how='inner')
-    
-    # Filter out any dates that might be too early due to the rolling window buffer
-    # Use the start date of the merged volatility data, as it already considers the rolling window.
-    # Or, more robustly, use the latest start date among all components.
-    # For simplicity, we'll ensure all components (vol, corr) are aligned.
-    # The inner merge already handles alignment. Let's ensure we filter from BTC's usable data start.
-    
-    # The common_start_date should ideally be derived from the final merged data
-    # or the latest of the minimum dates of all components.
-    # df_btc_vol.index.min() is a good reference.
-    if not df_merged_all.empty and not df_btc_vol.empty: # Check df_btc_vol for common_start_date
-       common_start_date = df_btc_vol.index.min() # Start date for volatility
-       # Correlation might start slightly later due to its own rolling window on returns.
-       # The inner merge already takes the intersection of dates.
-       # Let's use the df_merged_all's own min index if it's later.
-       if not df_merged_all.index.min() < common_start_date:
-           common_start_date = df_merged_all.index.min()
+    state = None if full else load_json(STATE_FILE)
+    if state and (state.get("window") != window or state.get("ticker") != EQUITY_TICKER):
+        print("Rolling window or ticker changed since the last run; recomputing from scratch.")
+        state = None
+    if state and state["series"]["btc"].get("last_date", "") > df_btc_raw.index.max().strftime(DATE_FORMAT):
+        print("BTC data ends before the stored state; recomputing from scratch.")
+        state = None
 
-       df_merged_all = df_merged_all[df_merged_all.index >= common_start_date]
+    if state and state["series"]["spy"].get("last_date") and state["series"]["btc_spy"].get("last_date"):
+        # Only the bars after the stored ones are needed, plus the last stored close to compute the first return
+        start_date_str = min(state["series"]["spy"]["last_date"], state["series"]["btc_spy"]["last_date"])
+        print(f"Incremental mode: output complete up to {state['output_last_date']}.")
+    else:
+        state = new_state(EQUITY_TICKER, window)
+        btc_min_date_for_spy = df_btc_raw.index.min() - timedelta(days=window + 10) # Adjusted buffer
+        start_date_str = btc_min_date_for_spy.strftime('%Y-%m-%d')
+    end_date_str = (df_btc_raw.index.max() + timedelta(days=1)).strftime('%Y-%m-%d')
+
+    df_spy_raw = fetch_spy_data(start_date_str, end_date_str, offline=offline)
+    if df_spy_raw is None:
+        return
 
+    previous_last_date = state["output_last_date"]
+    today = pd.Timestamp(datetime.utcnow().date())
+    committed_rows, provisional_rows = update_rows(state, df_btc_raw['close'], df_spy_raw['close'], today)
 
+    # Keep the committed rows already written, replace the provisional ones from the previous run
     output_data = []
-    for date, row in df_merged_all.iterrows():
-        output_data.append({
-            "date": date.strftime('%Y-%m-%d'),
-            "btc_volatility": row['volatility_btc'],
-            "spy_volatility": row['volatility_spy'],
-            "btc_spy_correlation": row['correlation'] # Added correlation
-        })
-    
-    output_data.sort(key=lambda x: x['date'])
+    if previous_last_date is not None:
+        output_data = [row for row in load_json(OUTPUT_FILE) or [] if row["date"] <= previous_last_date]
+    output_data.extend(committed_rows)
+    output_data.extend(provisional_rows)
 
     try:
-        with open(OUTPUT_FILE, 'w') as f:
-            json.dump(output_data, f, indent=4)
-        print(f"Successfully saved volatility and correlation data to {OUTPUT_FILE}")
+        json_writer.write_json(output_data, OUTPUT_FILE)
+        json_writer.write_json(state, STATE_FILE)
+        print(f"Successfully saved volatility and correlation data to {OUTPUT_FILE} "
+              f"({len(committed_rows) + len(provisional_rows)} new or updated rows, {len(output_data)} in total)")
     except Exception as e:
         print(f"Error saving output file: {e}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Compute BTC vs SPY volatility and correlation.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Use only the cached equity prices in data/equity/ instead of downloading missing dates.")
+    parser.add_argument("--matrix", action="store_true",
+                        help=f"Compute the rolling volatility and correlation matrix of all --crypto and --equities assets into {os.path.basename(MATRIX_OUTPUT_FILE)}.")
+    parser.add_argument("--crypto", type=lambda value: [s.strip().upper() for s in value.split(",") if s.strip()],
+                        default=MATRIX_CRYPTO_SYMBOLS, help="Comma-separated Binance symbols with 1d klines in data/ (matrix mode).")
+    parser.add_argument("--equities", type=lambda value: [s.strip().upper() for s in value.split(",") if s.strip()],
+                        default=MATRIX_EQUITY_TICKERS, help="Comma-separated equity tickers (matrix mode).")
+    parser.add_argument("--full", action="store_true",
+                        help=f"Ignore {os.path.basename(STATE_FILE)} and recompute the whole history.")
+    parser.add_argument("--window", type=int, default=ROLLING_WINDOW, help=f"Rolling window in days (default: {ROLLING_WINDOW}).")
+    args = parser.parse_args()
+    if args.matrix:
+        main_matrix(args.crypto, args.equities, window=args.window, offline=args.offline)
+    else:
+        main(offline=args.offline, full=args.full, window=args.window) 
\ No newline at end of file
@@ -0,0 +1,73 @@
+import os
+import json
+from datetime import datetime, timedelta
+import json_writer
+
+# Local store of on-chain metric values, one file per (metric, slug, interval) with the values keyed by date.
+# Besides the values, each store records which date ranges have been fetched ("fetched": inclusive
+# [start, end] day ranges), so days the API returned nothing for are not requested again on every run.
+
+DAY_FORMAT = '%Y-%m-%d'
+
+def store_path(directory, metric, slug, interval):
+    """Returns the store file, e.g. onchain/bitcoin_exchange_balance_1d.json."""
+    return os.path.join(directory, f"{slug}_{metric}_{interval}.json")
+
+def load_store(path, metric, slug, interval):
+    """Reads a store, or returns an empty one if the file is missing or unreadable."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Could not read {path}, starting an empty store: {e}")
+    return {"metric": metric, "slug": slug, "interval": interval, "fetched": [], "values": {}}
+
+def save_store(store, path):
+    json_writer.write_json(store, path)
+
+def _day(value):
+    return datetime.strptime(value, DAY_FORMAT).date() if isinstance(value, str) else value
+
+def _merge_ranges(ranges):
+    """Sorts and merges overlapping or adjacent inclusive (start, end) date ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def missing_ranges(store, from_day, to_day, refetch_days=0):
+    """
+    Returns the inclusive (start, end) date ranges within [from_day, to_day] that have not been fetched yet,
+    plus the last `refetch_days` days, which are fetched again to pick up late revisions.
+    """
+    from_day, to_day = _day(from_day), _day(to_day)
+    gaps = []
+    cursor = from_day
+    for start, end in ((_day(start), _day(end)) for start, end in store["fetched"]):
+        if end < cursor:
+            continue
+        if start > to_day:
+            break
+        if start > cursor:
+            gaps.append((cursor, start - timedelta(days=1)))
+        cursor = end + timedelta(days=1)
+    if cursor <= to_day:
+        gaps.append((cursor, to_day))
+    if refetch_days > 0:
+        gaps.append((max(from_day, to_day - timedelta(days=refetch_days - 1)), to_day))
+    return _merge_ranges(gaps)
+
+def add_values(store, values, fetched_from, fetched_to):
+    """Merges {day: value} into the store (new values win) and records [fetched_from, fetched_to] as fetched."""
+    store["values"].update(values)
+    ranges = [(_day(start), _day(end)) for start, end in store["fetched"]] + [(_day(fetched_from), _day(fetched_to))]
+    store["fetched"] = [[start.strftime(DAY_FORMAT), end.strftime(DAY_FORMAT)] for start, end in _merge_ranges(ranges)]
+
+def records(store, value_key, date_key="datetime"):
+    """The stored values as date-sorted records, e.g. [{"datetime": "2025-01-01", "exchange_balance": 1.0}, ...]."""
+    return [{date_key: day, value_key: store["values"][day]} for day in sorted(store["values"])]
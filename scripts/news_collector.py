@@ -1,8 +1,15 @@
 import os
+import re
 import json
 import requests
+import http_client
+import json_writer
+import history_store
+import news_dedup
 from datetime import datetime, timedelta
 import time
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuration
 NEWS_API_URL = "https://min-api.cryptocompare.com/data/v2/news/"
@@ -12,15 +19,35 @@ DAYS_TO_FETCH_NEWS = 365 # Target: 1 year of news
 NEWS_CATEGORIES = "BTC,CRYPTO,REGULATION,EXCHANGE" # Broader categories for better chance of relevant news
 NEWS_FEEDS = "coindesk,cointelegraph,theblock,decrypt,bloombergcrypto,wsjcrypto" # Example if we want specific feeds, check API docs
 
+# Exponential backoff when the API reports a rate limit: 5, 10, 20, 40, 80, 160 seconds, then give up
+RATE_LIMIT_BACKOFF_START = 5
+RATE_LIMIT_BACKOFF_MAX = 160
+
 MAJOR_EVENT_KEYWORDS = [
     "sec", "etf", "halving", "ban", "major", "launch", "crisis", "hack", 
     "regulation", "government", "partnership", "acquisition", "approval", 
     "lawsuit", "warning", "exploit", "crash", "rally", "record", "stablecoin",
     "cbdc", "adoption", "treasury", "fed", "senate", "congress"
 ]
+# Word forms the regular-plural suffix in build_keyword_pattern cannot reach, tagged as their keyword
+KEYWORD_VARIANTS = {
+    "rallies": "rally",
+    "crises": "crisis",
+    "hacker": "hack",
+}
+
+# Article fields scanned for MAJOR_EVENT_KEYWORDS; add "body" to also match on the article text
+KEYWORD_SEARCH_FIELDS = ["title"]
 
 OUTPUT_DIR_NEWS = os.path.join(os.path.dirname(__file__), "..", "data")
 OUTPUT_FILE_NEWS = os.path.join(OUTPUT_DIR_NEWS, "market_events_cryptocompare.json")
+# Incremental cursor: newest/oldest published_on reached so far and the URLs already stored
+STATE_FILE_NEWS = os.path.join(OUTPUT_DIR_NEWS, "news_collector_state.json")
+# Work-in-progress NDJSON spool and per-job checkpoints; compacted into OUTPUT_FILE_NEWS at the end of a run
+SPOOL_DIR_NEWS = os.path.join(OUTPUT_DIR_NEWS, "news_spool")
+# Date-partitioned copy of the events for the timeline page: one shard per month (YYYY-MM.json, events keyed by date)
+# and manifest.json with per-day event counts, so the page can draw its markers without downloading every event
+EVENT_INDEX_DIR = os.path.join(OUTPUT_DIR_NEWS, "market_events_index")
 
 # --- Helper function to manage API key (can be moved to a shared utility later) ---
 def get_api_key():
@@ -37,6 +64,49 @@ def get_api_key():
     #     return API_KEY # Fallback to hardcoded if not in .env for now
     return API_KEY
 
+# --- Keyword matching ---
+def _trie_to_regex(trie):
+    """Turns a character trie into a regex that shares common prefixes, e.g. {sec, senate} -> se(?:c|nate)."""
+    if "" in trie and len(trie) == 1:
+        return ""
+    branches = []
+    optional = False
+    for char in sorted(trie):
+        if char == "":
+            optional = True
+            continue
+        branches.append((r"\s+" if char == " " else re.escape(char)) + _trie_to_regex(trie[char]))
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if optional:
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+def build_keyword_pattern(keywords):
+    """
+    Compiles all keywords into one case-insensitive regex with word-boundary semantics,
+    so "sec" no longer matches "second" nor "ban" "bank". Only regular plurals ending in -s/-es
+    ("etfs", "hacks") match on their own; other forms ("rallies", "crises") must be listed as keywords
+    themselves (see KEYWORD_VARIANTS).
+    The alternation is built as a trie, so each position in the text is checked against all keywords
+    in a single pass instead of once per keyword. Multi-word keywords match across any whitespace.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in " ".join(keyword.lower().split()):
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return re.compile(r"\b(" + _trie_to_regex(trie) + r")(?:e?s)?\b", re.IGNORECASE)
+
+MAJOR_EVENT_PATTERN = build_keyword_pattern(MAJOR_EVENT_KEYWORDS + list(KEYWORD_VARIANTS))
+
+def find_keywords(text, pattern=MAJOR_EVENT_PATTERN, variants=KEYWORD_VARIANTS):
+    """Returns the sorted, de-duplicated keywords found in `text` (variants reported as their keyword)."""
+    if not text:
+        return []
+    words = (" ".join(match.group(1).lower().split()) for match in pattern.finditer(text))
+    return sorted({variants.get(word, word) for word in words})
+
 # --- Main data fetching logic ---
 def fetch_news_batch(api_key_to_use, before_timestamp=None, categories=None, feeds=None, limit=50):
     """
@@ -58,7 +128,8 @@ def fetch_news_batch(api_key_to_use, before_timestamp=None, categories=None, fee
     
     # print(f"Fetching news with params: {params}") # For debugging
     try:
-        response = requests.get(NEWS_API_URL, params=params)
+        # Rate limits are backed off by the caller (iter_news_events), so http_client must not also wait on them
+        response = http_client.get(NEWS_API_URL, params=params, retry_rate_limited=False)
         response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
         data = response.json()
         
@@ -90,24 +161,39 @@ def fetch_news_batch(api_key_to_use, before_timestamp=None, categories=None, fee
         print(f"An unexpected error occurred in fetch_news_batch: {e}")
         return None
 
-def collect_all_news(api_key_to_use, days_to_fetch, categories_filter=None, feeds_filter=None, initial_sleep=0.5, page_sleep=1.2):
+def iter_news_events(api_key_to_use, days_to_fetch, categories_filter=None, feeds_filter=None, initial_sleep=0.5, page_sleep=0,
+                     stop_at_timestamp=None, before_timestamp=None, seen_urls=None, cursor=None, on_page_done=None):
     """
-    Collects news articles for the specified number of days, handling pagination.
+    Fetch -> filter -> normalize stage of the news pipeline: pages backwards through the API and
+    yields one event dict per major-event article, newest first, without holding the results in memory.
+    Incremental options:
+    - stop_at_timestamp: stop paging once articles older than this are reached (the newest already stored)
+    - before_timestamp: start paging before this timestamp instead of from the latest news (to resume a backfill)
+    - seen_urls: articles with these URLs are skipped
+    - cursor: dict updated in place with the newest and oldest published_on seen by this run, and
+      "reached_target": whether paging got all the way down to the target, or the feed simply has no older
+      articles (an empty page); False after an error or another early stop
+    - on_page_done: called with the next page's lTs once every event of a page has been consumed,
+      which is the point where a checkpoint can safely be written
     """
-    all_collected_news = []
+    events_yielded = 0
+    seen_urls = seen_urls or set()
     # Target oldest timestamp (e.g., 365 days ago)
     oldest_timestamp_target = (datetime.utcnow() - timedelta(days=days_to_fetch)).timestamp()
-    current_oldest_fetched_ts = datetime.utcnow().timestamp() # Start with now
+    if stop_at_timestamp is not None:
+        oldest_timestamp_target = max(oldest_timestamp_target, stop_at_timestamp)
+    current_oldest_fetched_ts = before_timestamp or datetime.utcnow().timestamp() # Start with now
     
     # For the very first request, we don't set 'lTs' to get the absolute latest news.
     # Subsequent requests will use the timestamp of the oldest news item from the previous batch.
-    next_page_timestamp = None 
+    next_page_timestamp = before_timestamp
 
     print(f"Starting news collection. Target: {days_to_fetch} days back (until ~{datetime.fromtimestamp(oldest_timestamp_target).strftime('%Y-%m-%d')}).")
     time.sleep(initial_sleep) # Small initial delay
 
     max_api_calls = 100 # Safety break for API calls to avoid exhausting free tier quickly
     api_calls_count = 0
+    feed_exhausted = False
 
     while current_oldest_fetched_ts > oldest_timestamp_target and api_calls_count < max_api_calls:
         api_calls_count += 1
@@ -115,16 +201,22 @@ def collect_all_news(api_key_to_use, days_to_fetch, categories_filter=None, feed
         
         news_batch = fetch_news_batch(api_key_to_use, before_timestamp=next_page_timestamp, categories=categories_filter, feeds=feeds_filter)
 
-        if news_batch == "RATE_LIMIT_HIT":
-            print("Rate limit hit. Waiting for 60 seconds before retrying or stopping...")
-            time.sleep(60) # Wait a minute
-            # Optionally, could implement more sophisticated backoff or stop here
-            # For now, we'll try one more time after a delay, or just break if it persists
+        backoff = RATE_LIMIT_BACKOFF_START
+        while news_batch == "RATE_LIMIT_HIT" and backoff <= RATE_LIMIT_BACKOFF_MAX:
+            # Pause every feed sharing the API quota (not just this one), then retry with exponential backoff
+            print(f"Rate limit hit. Pausing all requests to the news API for {backoff} seconds...")
+            http_client.get_rate_limiter(NEWS_API_URL).pause(backoff)
             news_batch = fetch_news_batch(api_key_to_use, before_timestamp=next_page_timestamp, categories=categories_filter, feeds=feeds_filter)
-            if news_batch == "RATE_LIMIT_HIT" or news_batch is None:
-                print("Rate limit persisted or error after retry. Stopping collection.")
-                break
+            backoff *= 2
+        if news_batch == "RATE_LIMIT_HIT":
+            print("Rate limit persisted after backing off. Stopping collection.")
+            break
         
+        if news_batch == []:
+            # A successful but empty page: the feed has nothing older, which is as good as reaching the target
+            print("No more news returned by the API. Stopping collection.")
+            feed_exhausted = True
+            break
         if not news_batch:
             print("No news batch returned or error occurred. Halting further collection.")
             break
@@ -139,6 +231,9 @@ def collect_all_news(api_key_to_use, days_to_fetch, categories_filter=None, feed
 
             # Update the oldest timestamp we've seen so far from this batch
             current_oldest_fetched_ts = min(current_oldest_fetched_ts, published_on)
+            if cursor is not None:
+                cursor["newest_published_on"] = max(cursor.get("newest_published_on") or 0, published_on)
+                cursor["oldest_published_on"] = min(cursor.get("oldest_published_on") or published_on, published_on)
 
             if published_on < oldest_timestamp_target:
                 # This news item (and subsequent ones in this sorted batch) are older than our target window
@@ -147,16 +242,15 @@ def collect_all_news(api_key_to_use, days_to_fetch, categories_filter=None, feed
                 current_oldest_fetched_ts = published_on # Ensure outer loop condition updates
                 batch_had_relevant_items = True # Mark that we at least saw an item to process the timestamp
                 break # Stop processing this batch
+
+            if news_item.get("url") in seen_urls:
+                continue # Already stored by a previous run
             
             # Keyword filtering for major events
             title_lower = title.lower()
-            is_major_event = False
-            for keyword in MAJOR_EVENT_KEYWORDS:
-                if keyword in title_lower:
-                    is_major_event = True
-                    break
+            tags = sorted({keyword for field in KEYWORD_SEARCH_FIELDS for keyword in find_keywords(news_item.get(field))})
             
-            if not is_major_event:
+            if not tags:
                 # print(f"Skipping (not major): {title}") # For debugging
                 continue # Skip if no major event keywords found in title
 
@@ -171,13 +265,16 @@ def collect_all_news(api_key_to_use, days_to_fetch, categories_filter=None, feed
             if is_relevant_topic: # and is_major_event is already true
                 event = {
                     "date": datetime.fromtimestamp(published_on).strftime('%Y-%m-%d'),
+                    "published_on": published_on,
                     "title": title.strip(),
                     "description": news_item.get("body", "")[:300].strip() + "...", # Brief summary
                     "url": news_item.get("url", "#"),
-                    "source": news_item.get("source_info", {}).get("name", "Unknown")
+                    "source": news_item.get("source_info", {}).get("name", "Unknown"),
+                    "tags": tags
                 }
-                all_collected_news.append(event)
+                events_yielded += 1
                 batch_had_relevant_items = True
+                yield event
         
         if not batch_had_relevant_items and len(news_batch) > 0:
             print(f"Current batch from {datetime.fromtimestamp(news_batch[0].get('published_on',0)).strftime('%Y-%m-%d')} did not yield relevant items or all were too old.")
@@ -197,25 +294,160 @@ def collect_all_news(api_key_to_use, days_to_fetch, categories_filter=None, feed
             print("Could not determine next page timestamp. Halting.")
             break
         
-        print(f"Batch processed. {len(all_collected_news)} total events collected. Next fetch before {datetime.fromtimestamp(next_page_timestamp).strftime('%Y-%m-%d %H:%M:%S') if next_page_timestamp else 'N/A'}.")
-        time.sleep(page_sleep) # Respect API rate limits
+        if on_page_done is not None:
+            on_page_done(next_page_timestamp)
+        print(f"Batch processed. {events_yielded} total events collected. Next fetch before {datetime.fromtimestamp(next_page_timestamp).strftime('%Y-%m-%d %H:%M:%S') if next_page_timestamp else 'N/A'}.")
+        time.sleep(page_sleep) # API rate limits are enforced by http_client's shared limiter; this is an extra courtesy delay
 
     if api_calls_count >= max_api_calls:
         print(f"Reached maximum API call limit ({max_api_calls}) for this run.")
+    if cursor is not None:
+        cursor["reached_target"] = feed_exhausted or current_oldest_fetched_ts <= oldest_timestamp_target
 
-    # Deduplicate (simple approach based on URL, can be improved)
+def collect_all_news(api_key_to_use, days_to_fetch, categories_filter=None, feeds_filter=None, initial_sleep=0.5, page_sleep=0,
+                     stop_at_timestamp=None, before_timestamp=None, seen_urls=None, cursor=None):
+    """
+    Collects news articles for the specified number of days into memory (see iter_news_events for the options).
+    Exact (URL) and near-duplicate (syndicated) stories are collapsed into one event with a list of sources.
+    """
+    all_collected_news = list(iter_news_events(api_key_to_use, days_to_fetch, categories_filter, feeds_filter, initial_sleep, page_sleep,
+                                               stop_at_timestamp, before_timestamp, seen_urls, cursor))
+    # Items arrive newest first, so the newest copy of a story is kept as the representative.
     if all_collected_news:
-        seen_urls = set()
-        deduplicated_news = []
-        for item in sorted(all_collected_news, key=lambda x: x["date"], reverse=True): # Process newer first for dedup
-            if item["url"] not in seen_urls:
-                deduplicated_news.append(item)
-                seen_urls.add(item["url"])
-        all_collected_news = sorted(deduplicated_news, key=lambda x: x["date"]) # Sort back by date
+        all_collected_news = news_dedup.cluster_events(all_collected_news)
+        all_collected_news.reverse() # Sort back by date (oldest first)
         print(f"Deduplicated news: {len(all_collected_news)} items.")
-
     return all_collected_news
 
+def load_json_file(path, default):
+    """Reads a JSON file, returning `default` if it is missing or unreadable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Could not read {path}: {e}")
+        return default
+
+def iter_ndjson(path):
+    """Yields the records of an NDJSON file, ignoring a partial last line left by a crash."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.endswith("\n"):
+                yield json.loads(line)
+
+def spool_news_job(job_name, api_key_to_use, days_to_fetch, feed, categories_filter=None,
+                   stop_at_timestamp=None, before_timestamp=None, seen_urls=None):
+    """
+    Streams one feed's events to SPOOL_DIR_NEWS/<job_name>.ndjson as they are fetched (URL-deduplicated on
+    the fly), writing a checkpoint after every page. If a checkpoint from a crashed run exists, paging
+    resumes where it stopped instead of starting over. Returns the checkpoint (with its cursor).
+    """
+    os.makedirs(SPOOL_DIR_NEWS, exist_ok=True)
+    spool_path = os.path.join(SPOOL_DIR_NEWS, f"{job_name}.ndjson")
+    checkpoint_path = os.path.join(SPOOL_DIR_NEWS, f"{job_name}.checkpoint.json")
+    job_seen_urls = set(seen_urls or ())
+
+    checkpoint = load_json_file(checkpoint_path, None)
+    if checkpoint and checkpoint.get("complete"):
+        print(f"[{job_name}] Already fetched by an earlier run, waiting for compaction.")
+        return checkpoint
+    if checkpoint:
+        before_timestamp = checkpoint["next_before"]
+        stop_at_timestamp = checkpoint["stop_at"]
+        # A crash mid-write leaves a partial last line; drop it so the next record starts on a line of its own
+        if os.path.exists(spool_path):
+            history_store.truncate_partial_tail(spool_path)
+        job_seen_urls.update(event["url"] for event in iter_ndjson(spool_path))
+        print(f"[{job_name}] Resuming from checkpoint before {datetime.fromtimestamp(before_timestamp).strftime('%Y-%m-%d %H:%M:%S') if before_timestamp else 'Latest'}.")
+    else:
+        checkpoint = {"stop_at": stop_at_timestamp, "next_before": before_timestamp, "cursor": {}, "complete": False}
+        open(spool_path, 'w').close()
+
+    with open(spool_path, 'a', encoding='utf-8') as spool:
+        def on_page_done(next_before):
+            spool.flush()
+            os.fsync(spool.fileno())
+            checkpoint["next_before"] = next_before
+            json_writer.write_json(checkpoint, checkpoint_path)
+
+        for event in iter_news_events(api_key_to_use, days_to_fetch, categories_filter=categories_filter, feeds_filter=feed, initial_sleep=0,
+                                      stop_at_timestamp=stop_at_timestamp, before_timestamp=before_timestamp,
+                                      seen_urls=job_seen_urls, cursor=checkpoint["cursor"], on_page_done=on_page_done):
+            if event["url"] in job_seen_urls:
+                continue
+            job_seen_urls.add(event["url"])
+            spool.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    checkpoint["complete"] = True
+    json_writer.write_json(checkpoint, checkpoint_path)
+    return checkpoint
+
+def run_spool_jobs(jobs, api_key_to_use, days_to_fetch, categories_filter=None, seen_urls=None, max_workers=None):
+    """
+    Runs the spool jobs ({name: (feed, stop_at_timestamp, before_timestamp)}) concurrently. All feeds share the
+    news API quota through http_client's limiter, so a 429 on one feed backs off every feed instead of
+    stalling only the slow one. Returns {name: checkpoint}.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs)) as executor:
+        futures = {
+            name: executor.submit(spool_news_job, name, api_key_to_use, days_to_fetch, feed, categories_filter,
+                                  stop_at_timestamp, before_timestamp, seen_urls)
+            for name, (feed, stop_at_timestamp, before_timestamp) in jobs.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+def compact_news(existing_events, job_names):
+    """
+    Compaction step: merges the stored events with the spooled ones, collapses near-duplicates
+    (across feeds and runs) and returns the events sorted by date, as the timeline page expects.
+    Stored events come first, so an event that is already published keeps its place as the representative.
+    """
+    spooled = itertools.chain.from_iterable(
+        iter_ndjson(os.path.join(SPOOL_DIR_NEWS, f"{name}.ndjson")) for name in job_names)
+    merged = news_dedup.cluster_events(itertools.chain(existing_events, spooled))
+    return sorted(merged, key=lambda x: (x["date"], x.get("published_on", 0)))
+
+def source_urls(events):
+    """The URLs of every source of `events`, including the ones folded in as extra sources."""
+    return {source["url"] for event in events for source in event.get("sources") or [event]}
+
+def clear_spool(job_names):
+    """Removes the spool files and checkpoints once their events are in the compacted file."""
+    for name in job_names:
+        for suffix in (".ndjson", ".checkpoint.json"):
+            path = os.path.join(SPOOL_DIR_NEWS, f"{name}{suffix}")
+            if os.path.exists(path):
+                os.remove(path)
+
+def write_event_index(events, index_dir=None):
+    """
+    Writes the per-month shards and the manifest of per-day counts for `events` (sorted by date)
+    to `index_dir` (default: EVENT_INDEX_DIR). Shards of months that no longer have events are removed.
+    """
+    index_dir = index_dir or EVENT_INDEX_DIR
+    os.makedirs(index_dir, exist_ok=True)
+    shards = {}
+    for event in events:
+        shards.setdefault(event["date"][:7], {}).setdefault(event["date"], []).append(event)
+
+    for month, events_by_date in shards.items():
+        json_writer.write_json(events_by_date, os.path.join(index_dir, f"{month}.json"), ensure_ascii=False)
+    for filename in os.listdir(index_dir):
+        if filename != "manifest.json" and filename.endswith(".json") and filename[:-5] not in shards:
+            os.remove(os.path.join(index_dir, filename))
+
+    # The manifest is written last, so it never points at a shard that is not on disk yet
+    manifest = {
+        "months": sorted(shards),
+        "counts": {date: len(day_events) for events_by_date in shards.values() for date, day_events in events_by_date.items()},
+    }
+    json_writer.write_json(manifest, os.path.join(index_dir, "manifest.json"))
+    print(f"Event index written to {index_dir}: {len(shards)} monthly shards, {len(manifest['counts'])} days with events.")
+
 def main():
     effective_api_key = get_api_key()
     if not effective_api_key or effective_api_key == "YOUR_CRYPTOCOMPARE_API_KEY": # Final check
@@ -223,24 +455,73 @@ def main():
         return
 
     print(f"Starting news collection using API key ending with ...{effective_api_key[-6:]}")
-    
-    collected_events_data = collect_all_news(effective_api_key, DAYS_TO_FETCH_NEWS, categories_filter=NEWS_CATEGORIES, feeds_filter=NEWS_FEEDS)
 
-    if collected_events_data:
+    feeds = [feed.strip() for feed in NEWS_FEEDS.split(",") if feed.strip()]
+    existing_events = load_json_file(OUTPUT_FILE_NEWS, [])
+    state = load_json_file(STATE_FILE_NEWS, {})
+    seen_urls = set(state.get("seen_urls", [])) | {event["url"] for event in existing_events}
+    newest_stored = state.get("newest_published_on")
+    oldest_stored = state.get("oldest_published_on")
+
+    # 1. New articles: page back from the latest news until we reach what is already stored.
+    # 2. Backfill: if an earlier run stopped at the API call cap before reaching the target window, continue below it.
+    # The state only changes after compaction, so a crashed run recreates the same jobs and resumes their checkpoints.
+    if newest_stored:
+        print(f"Incremental mode: {len(existing_events)} events stored, fetching news published after {datetime.fromtimestamp(newest_stored).strftime('%Y-%m-%d %H:%M:%S')}.")
+    new_jobs = {f"{feed}.new": (feed, newest_stored, None) for feed in feeds}
+    oldest_timestamp_target = (datetime.utcnow() - timedelta(days=DAYS_TO_FETCH_NEWS)).timestamp()
+    backfill_jobs = {}
+    if oldest_stored and oldest_stored > oldest_timestamp_target:
+        print(f"Resuming backfill before {datetime.fromtimestamp(oldest_stored).strftime('%Y-%m-%d %H:%M:%S')}.")
+        backfill_jobs = {f"{feed}.backfill": (feed, None, oldest_stored) for feed in feeds}
+
+    checkpoints = run_spool_jobs({**new_jobs, **backfill_jobs}, effective_api_key, DAYS_TO_FETCH_NEWS,
+                                 categories_filter=NEWS_CATEGORIES, seen_urls=seen_urls)
+    new_cursors = [checkpoints[name]["cursor"] for name in new_jobs]
+    backfill_cursors = [checkpoints[name]["cursor"] for name in backfill_jobs]
+
+    # Newest: only advanced if every feed got down to the stored articles, otherwise the gap is fetched next time.
+    newest = [c["newest_published_on"] for c in new_cursors if c.get("newest_published_on")]
+    if newest and (not newest_stored or all(c.get("reached_target") for c in new_cursors)):
+        newest_stored = max(newest + [newest_stored or 0])
+    # Oldest: the feed that got the least far back decides where the next backfill resumes.
+    oldest = [c["oldest_published_on"] for c in (backfill_cursors or new_cursors) if c.get("oldest_published_on")]
+    if oldest:
+        oldest_stored = max(oldest) if oldest_stored is None else min(oldest_stored, max(oldest))
+
+    job_names = list(checkpoints)
+    merged_events = compact_news(existing_events, job_names)
+    stored_urls = source_urls(existing_events)
+    merged_urls = source_urls(merged_events)
+    # Written whenever compaction changed anything: new events, but also new sources folded into stored events
+    if merged_events != existing_events:
         os.makedirs(OUTPUT_DIR_NEWS, exist_ok=True)
         try:
-            with open(OUTPUT_FILE_NEWS, 'w', encoding='utf-8') as f:
-                json.dump(collected_events_data, f, indent=4, ensure_ascii=False)
-            print(f"Successfully collected {len(collected_events_data)} news events and saved to {OUTPUT_FILE_NEWS}")
-            if collected_events_data:
-                print(f"Sample - First event: {collected_events_data[0]['date']} - {collected_events_data[0]['title']}")
-                print(f"Sample - Last event: {collected_events_data[-1]['date']} - {collected_events_data[-1]['title']}")
+            json_writer.write_json(merged_events, OUTPUT_FILE_NEWS, ensure_ascii=False)
+            print(f"Successfully collected {len(merged_urls - stored_urls)} new articles ({len(merged_events)} events in total) and saved to {OUTPUT_FILE_NEWS}")
+            print(f"Sample - First event: {merged_events[0]['date']} - {merged_events[0]['title']}")
+            print(f"Sample - Last event: {merged_events[-1]['date']} - {merged_events[-1]['title']}")
         except IOError as e:
             print(f"Error writing to file {OUTPUT_FILE_NEWS}: {e}")
+            return
         except Exception as e:
             print(f"An unexpected error occurred during file writing: {e}")
+            return
+        write_event_index(merged_events)
     else:
-        print("No news events were collected, or an error prevented collection.")
+        print("No new news events were collected, or an error prevented collection.")
+        if merged_events and not os.path.exists(os.path.join(EVENT_INDEX_DIR, "manifest.json")):
+            write_event_index(merged_events)
+    seen_urls.update(merged_urls)
+
+    # The cursor is only advanced after the events are safely on disk
+    if newest_stored:
+        json_writer.write_json({
+            "newest_published_on": newest_stored,
+            "oldest_published_on": oldest_stored,
+            "seen_urls": sorted(seen_urls),
+        }, STATE_FILE_NEWS)
+    clear_spool(job_names)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
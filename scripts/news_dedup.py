@@ -0,0 +1,123 @@
+import re
+import hashlib
+from datetime import datetime
+import numpy as np
+
+# --- Near-duplicate detection for news events ---
+# Every event gets a 64-bit SimHash of its title + description. Syndicated copies of a story
+# differ in a few words, so their hashes differ in only a few bits. The hash is split into
+# BANDS bands; two hashes within MAX_HAMMING_DISTANCE bits of each other must agree exactly on
+# at least one band (pigeonhole), so only events sharing a band bucket are compared.
+
+HASH_BITS = 64
+BANDS = 4
+BAND_BITS = HASH_BITS // BANDS
+MAX_HAMMING_DISTANCE = 3
+# Copies of a story are published within a few days of each other; beyond that, a similar
+# title ("Bitcoin price analysis") is a different event.
+MAX_DAYS_APART = 3
+
+_WORD_RE = re.compile(r"\w+")
+
+def _features(text):
+    """Words and word bigrams of the lowercased text."""
+    words = _WORD_RE.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+_BIT_SHIFTS = np.arange(HASH_BITS, dtype=np.uint64)
+
+def simhash(text):
+    """Returns the 64-bit SimHash of `text` (bit i is set if most features have bit i set)."""
+    features = _features(text)
+    if not features:
+        return 0
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big") for f in features),
+        dtype=np.uint64, count=len(features))
+    bit_counts = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).sum(axis=0)
+    return int(np.packbits(bit_counts * 2 > len(features), bitorder="little").view("<u8")[0])
+
+def _event_text(event):
+    description = event.get("description", "")
+    if description.endswith("..."):
+        description = description[:-3]
+    return f"{event.get('title', '')} {description}"
+
+def _event_day(event):
+    if event.get("published_on"):
+        return event["published_on"] / 86400
+    return datetime.strptime(event["date"], '%Y-%m-%d').timestamp() / 86400
+
+def _sources_of(event):
+    """The sources an event already carries, or a single entry built from its own source/url."""
+    return event.get("sources") or [{"source": event.get("source", "Unknown"), "url": event.get("url", "#")}]
+
+class NearDuplicateIndex:
+    """
+    Streaming index of cluster representatives. `add` either folds an event into an existing
+    near-duplicate cluster or registers it as a new representative, in O(1) expected time.
+    """
+
+    def __init__(self):
+        self.representatives = []
+        self.hashes = []
+        self.days = []
+        self.buckets = {}
+        self.by_url = {}
+
+    def _bands(self, value):
+        mask = (1 << BAND_BITS) - 1
+        return [(band, value >> (band * BAND_BITS) & mask) for band in range(BANDS)]
+
+    def find(self, value, day):
+        """Returns the index of a representative within MAX_HAMMING_DISTANCE bits and MAX_DAYS_APART days, or None."""
+        checked = set()
+        for key in self._bands(value):
+            for candidate in self.buckets.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if abs(self.days[candidate] - day) <= MAX_DAYS_APART and \
+                   bin(self.hashes[candidate] ^ value).count("1") <= MAX_HAMMING_DISTANCE:
+                    return candidate
+        return None
+
+    def add(self, event):
+        """Adds an event; returns True if it started a new cluster, False if it was merged into one."""
+        match = self.by_url.get(event.get("url"))
+        value = simhash(_event_text(event))
+        day = _event_day(event)
+        if match is None:
+            match = self.find(value, day)
+
+        if match is not None:
+            representative = self.representatives[match]
+            known_urls = {s["url"] for s in representative["sources"]}
+            for source in _sources_of(event):
+                if source["url"] not in known_urls:
+                    representative["sources"].append(source)
+                    known_urls.add(source["url"])
+                    self.by_url[source["url"]] = match
+            return False
+
+        representative = dict(event, sources=list(_sources_of(event)))
+        position = len(self.representatives)
+        self.representatives.append(representative)
+        self.hashes.append(value)
+        self.days.append(day)
+        for key in self._bands(value):
+            self.buckets.setdefault(key, []).append(position)
+        for source in representative["sources"]:
+            self.by_url[source["url"]] = position
+        return True
+
+def cluster_events(events):
+    """
+    Collapses exact (same URL) and near-duplicate events into one event per cluster.
+    The first event of a cluster is kept; the others are recorded in its "sources" list.
+    Returns the clustered events in the input order.
+    """
+    index = NearDuplicateIndex()
+    for event in events:
+        index.add(event)
+    return index.representatives
@@ -1,161 +1,382 @@
 import os
+import argparse
 import requests
 import json
 from datetime import datetime, timedelta
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import http_client
+import history_store
+import json_writer
 
 # --- Constants ---
 BASE_URL = "https://fapi.binance.com"
-DATA_DIR = "data"
-MAX_RETRIES = 3
-RETRY_DELAY = 5  # seconds
-
-# Ensure data directory exists
-os.makedirs(DATA_DIR, exist_ok=True)
+# The script is in 'scripts/', so DATA_DIR is '../data/' wherever it is run from
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+# Concurrent collection tasks (symbols x endpoints); the shared http_client budget still applies
+MAX_WORKERS = 8
+# /fapi/v1/fundingRate returns at most 1000 records per call
+FUNDING_RATE_LIMIT = 1000
+FUNDING_INTERVAL_MS = 8 * 60 * 60 * 1000
+# /futures/data/* endpoints: max 500 rows per call, only the last ~30 days are served
+FUTURES_DATA_LIMIT = 500
+FUTURES_DATA_MAX_DAYS = 30
+PERIOD_MS = {
+    "5m": 5 * 60_000, "15m": 15 * 60_000, "30m": 30 * 60_000, "1h": 3_600_000, "2h": 2 * 3_600_000,
+    "4h": 4 * 3_600_000, "6h": 6 * 3_600_000, "12h": 12 * 3_600_000, "1d": 86_400_000,
+}
+FUTURES_DATA_ENDPOINTS = {
+    "long_short_ratio": "/futures/data/globalLongShortAccountRatio",
+    "open_interest": "/futures/data/openInterestHist",
+    "top_trader_long_short_account_ratio": "/futures/data/topLongShortAccountRatio",
+    "top_trader_long_short_position_ratio": "/futures/data/topLongShortPositionRatio",
+}
+# Periods accumulated into the local history on every run
+HISTORY_PERIODS = list(PERIOD_MS)
+# Append-only, de-duplicated history of the 30-day-limited series (see history_store.py)
+HISTORY_DIR = os.path.join(DATA_DIR, "history")
+# Binance USD-M perpetuals launched in September 2019; nothing is listed before this
+FUNDING_HISTORY_START_MS = int(datetime(2019, 9, 1).timestamp() * 1000)
+# Plot-ready funding series for the participants page: bucket size and offset of the first bucket from the epoch
+# (weeks start on Monday; 1970-01-01 was a Thursday)
+FUNDING_SERIES_PERIODS = {
+    "1d": (86_400_000, 0),
+    "1w": (7 * 86_400_000, 4 * 86_400_000),
+}
 
 # --- Helper Functions ---
 def save_data_to_json(data, filename):
     """Saves data to a JSON file in the data directory."""
     filepath = os.path.join(DATA_DIR, filename)
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=4)
+    json_writer.write_json(data, filepath)
     print(f"Data saved to {filepath}")
 
+def load_data_from_json(filename):
+    """Loads a previously saved JSON file from the data directory. Returns None if it is missing or unreadable."""
+    filepath = os.path.join(DATA_DIR, filename)
+    try:
+        with open(filepath, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Could not read {filepath}: {e}")
+        return None
+
 def make_api_request(endpoint, params=None):
-    """Makes a request to the Binance API with retries."""
+    """Makes a request to the Binance API (retries and rate limiting are handled by http_client)."""
     url = f"{BASE_URL}{endpoint}"
-    for attempt in range(MAX_RETRIES):
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"API request failed for {url} with params {params}: {e}")
-            if attempt < MAX_RETRIES - 1:
-                print(f"Retrying in {RETRY_DELAY} seconds...")
-                time.sleep(RETRY_DELAY)
-            else:
-                print("Max retries reached. Skipping this request.")
-                return None
+    try:
+        response = http_client.get(url, params=params)
+        response.raise_for_status()  # Raise an exception for bad status codes
+        return response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"API request failed for {url} with params {params}: {e}")
+        print("Max retries reached. Skipping this request.")
+        return None
 
 # --- Data Collection Functions ---
 
-def get_funding_rate_history(symbol="BTCUSDT", days_to_fetch=30):
+def fetch_funding_rate_window(symbol, start_time_ms, end_time_ms):
+    """
+    Fetches every funding rate between start_time_ms and end_time_ms (inclusive).
+    One request covers FUNDING_RATE_LIMIT records; if a window holds more (symbols with 4h/1h funding),
+    it keeps paging from the last fundingTime. Returns None if a request failed.
+    """
+    records = []
+    current_start = start_time_ms
+    while current_start <= end_time_ms:
+        params = {"symbol": symbol, "startTime": current_start, "endTime": end_time_ms, "limit": FUNDING_RATE_LIMIT}
+        page = make_api_request("/fapi/v1/fundingRate", params)
+        if page is None:
+            return None
+        records.extend(page)
+        # A full page can still end the window: stop if the next 8-hourly funding would be past its end
+        if len(page) < FUNDING_RATE_LIMIT or page[-1]["fundingTime"] + FUNDING_INTERVAL_MS > end_time_ms:
+            break
+        current_start = page[-1]["fundingTime"] + 1
+    return records
+
+def get_funding_rate_history(symbol="BTCUSDT", days_to_fetch=30, incremental=False, max_workers=4):
     """
     Fetches funding rate history for a given symbol.
-    Binance API returns max 1000 records. If more needed, multiple calls would be required.
-    For simplicity, we'll fetch the most recent 'limit' records up to 'days_to_fetch' * (24/8) assuming 8-hour funding intervals.
-    The API documentation specifies: "If startTime and endTime are not sent, the most recent limit datas are returned."
-    "Default 100; max 1000" for limit.
-    To get approximately `days_to_fetch` days of data (assuming 3 funding rates per day):
-    limit = days_to_fetch * 3
-    """
-    print(f"Fetching funding rate history for {symbol} for the last {days_to_fetch} days...")
-    # Assuming 3 funding intervals per day (every 8 hours)
-    limit = min(days_to_fetch * 3, 1000) # Cap at API max limit
-    params = {"symbol": symbol, "limit": limit}
-    data = make_api_request("/fapi/v1/fundingRate", params)
+    Binance API returns max 1000 records per call, so the range is split into windows of
+    FUNDING_RATE_LIMIT funding intervals (8 hours each) that are fetched concurrently and merged on fundingTime.
+    days_to_fetch=None fetches everything back to the contract listing (the API starts at the first record).
+    With incremental=True, only the ranges before and after the records already on disk are requested
+    and merged into the existing file instead of overwriting it. Once a fetch from FUNDING_HISTORY_START_MS
+    has reached the first listed record, that time is kept in <symbol>_funding_rate_state.json and the
+    (empty) range before it is not requested again.
+    """
+    filename = f"{symbol.lower()}_funding_rate.json"
+    state_filename = f"{symbol.lower()}_funding_rate_state.json"
+    end_time_ms = int(datetime.now().timestamp() * 1000)
+    if days_to_fetch is None:
+        start_time_ms = FUNDING_HISTORY_START_MS
+        print(f"Fetching full funding rate history for {symbol}...")
+    else:
+        start_time_ms = int((datetime.now() - timedelta(days=days_to_fetch)).timestamp() * 1000)
+        print(f"Fetching funding rate history for {symbol} for the last {days_to_fetch} days...")
+
+    existing = load_data_from_json(filename) if incremental else None
+    listing_time = (load_data_from_json(state_filename) or {}).get("listing_time") if incremental else None
+    if existing:
+        # Only ask for what is missing on either side of the stored history
+        first_stored, last_stored = existing[0]["fundingTime"], existing[-1]["fundingTime"]
+        ranges = [(last_stored + 1, end_time_ms)]
+        listing_reached = listing_time is not None and first_stored <= listing_time
+        if start_time_ms < first_stored and not listing_reached:
+            ranges.insert(0, (start_time_ms, first_stored - 1))
+        print(f"Incremental mode: {len(existing)} funding rates on disk, topping up from {datetime.fromtimestamp(last_stored/1000)}")
+    else:
+        ranges = [(start_time_ms, end_time_ms)]
+
+    window_ms = FUNDING_RATE_LIMIT * FUNDING_INTERVAL_MS
+    windows = []
+    for range_start, range_end in ranges:
+        for window_start in range(range_start, range_end + 1, window_ms):
+            windows.append((window_start, min(window_start + window_ms - 1, range_end)))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pages = list(executor.map(lambda w: fetch_funding_rate_window(symbol, w[0], w[1]), windows))
+    if any(page is None for page in pages):
+        print(f"Failed to fetch part of the funding rate history for {symbol}. Nothing saved.")
+        return None
+
+    by_funding_time = {record["fundingTime"]: record for record in existing or []}
+    for page in pages:
+        by_funding_time.update((record["fundingTime"], record) for record in page)
+    data = [by_funding_time[t] for t in sorted(by_funding_time)]
+    print(f"Fetched {sum(len(page) for page in pages)} funding rates in {len(windows)} windows, {len(data)} in total.")
+
     if data:
-        save_data_to_json(data, f"{symbol.lower()}_funding_rate.json")
+        save_data_to_json(data, filename)
+        save_funding_series(data, symbol)
+        # Everything from FUNDING_HISTORY_START_MS was requested, so the first record is the listing
+        if ranges[0][0] == FUNDING_HISTORY_START_MS and data[0]["fundingTime"] != listing_time:
+            save_data_to_json({"listing_time": data[0]["fundingTime"]}, state_filename)
     return data
 
-def get_long_short_ratio(symbol="BTCUSDT", period="1d", days_to_fetch=30):
+# --- Precomputed funding series ---
+
+def aggregate_funding_rates(data, period="1d"):
     """
-    Fetches the global long/short account ratio for a given symbol and period.
-    API provides data for the latest 30 days.
+    Reduces sorted funding rate records to one point per UTC day or week: [bucket start ms, last rate in the bucket].
     """
-    print(f"Fetching long/short ratio for {symbol} (period: {period}) for the last {days_to_fetch} days...")
-    # API limit is 500, and data is available for last 30 days.
-    # If period is '1d', limit=30 will get all available daily data.
-    limit = days_to_fetch
-    if period != "1d": # Adjust limit for smaller periods if necessary, capped at 500
-        intervals_per_day = {"5m": 288, "15m": 96, "30m": 48, "1h": 24, "2h": 12, "4h": 6, "6h": 4, "12h": 2}
-        limit = min(days_to_fetch * intervals_per_day.get(period, 1), 500)
-
-    # Removing startTime and endTime to rely on API default for most recent data
-    params = {
-        "symbol": symbol,
-        "period": period,
-        "limit": limit
-    }
-    data = make_api_request("/futures/data/globalLongShortAccountRatio", params)
-    if data:
-        save_data_to_json(data, f"{symbol.lower()}_long_short_ratio_{period}.json")
-    return data
+    bucket_ms, offset_ms = FUNDING_SERIES_PERIODS[period]
+    points = []
+    for record in data:
+        bucket = (record["fundingTime"] - offset_ms) // bucket_ms * bucket_ms + offset_ms
+        rate = float(record["fundingRate"])
+        if points and points[-1][0] == bucket:
+            points[-1][1] = rate
+        else:
+            points.append([bucket, rate])
+    return points
 
-def get_open_interest_history(symbol="BTCUSDT", period="1d", days_to_fetch=30):
+def split_sign_segments(points):
     """
-    Fetches open interest history for a given symbol and period.
-    API provides data for the latest 1 month.
+    Splits [x, y] points into runs of the same sign so each run can be filled green or red.
+    A sign change inserts the linearly interpolated zero crossing, which ends one run and starts the next;
+    a point that is exactly zero is a run of its own, and the run after it takes the sign of its first point.
+    Returns [{"sign": 1|-1|0, "points": [...]}, ...].
+
+    >>> [s["sign"] for s in split_sign_segments([[0, 1e-4], [1, 0.0], [2, 1e-4], [3, 1e-4], [4, -1e-4]])]
+    [1, 0, 1, -1]
+    >>> split_sign_segments([[0, 1e-4], [1, 0.0], [2, 1e-4], [3, 1e-4]])[-1]["points"]
+    [[2, 0.0001], [3, 0.0001]]
     """
-    print(f"Fetching open interest history for {symbol} (period: {period}) for the last {days_to_fetch} days...")
-    # API limit is 500, and data is available for last 30 days (1 month).
-    # If period is '1d', limit=30 will get all available daily data.
-    limit = days_to_fetch
-    if period != "1d": # Adjust limit for smaller periods if necessary, capped at 500
-        intervals_per_day = {"5m": 288, "15m": 96, "30m": 48, "1h": 24, "2h": 12, "4h": 6, "6h": 4, "12h": 2}
-        limit = min(days_to_fetch * intervals_per_day.get(period, 1), 500)
-
-    # Removing startTime and endTime to rely on API default for most recent data
-    params = {
-        "symbol": symbol,
-        "period": period,
-        "limit": limit
-    }
-    data = make_api_request("/futures/data/openInterestHist", params)
+    segments = []
+    current = []
+    current_sign = 0
+    for i, (x, y) in enumerate(points):
+        sign = (y > 0) - (y < 0)
+        if sign == 0:
+            if current:
+                segments.append({"sign": current_sign, "points": current})
+            segments.append({"sign": 0, "points": [[x, y]]})
+            current = []
+        elif not current:
+            current = [[x, y]]
+            current_sign = sign
+        elif sign != current_sign:
+            # Signs differ, so prev_y - y is never zero here
+            prev_x, prev_y = points[i - 1]
+            zero_point = [int(round(prev_x + prev_y / (prev_y - y) * (x - prev_x))), 0.0]
+            current.append(zero_point)
+            segments.append({"sign": current_sign, "points": current})
+            current = [zero_point, [x, y]]
+            current_sign = sign
+        else:
+            current.append([x, y])
+    if current:
+        segments.append({"sign": current_sign, "points": current})
+    return segments
+
+def save_funding_series(data, symbol):
+    """
+    Writes the daily and weekly funding series of a symbol, already split into sign segments,
+    so the participants page plots them without downloading or re-aggregating the raw history.
+    """
+    for period in FUNDING_SERIES_PERIODS:
+        points = aggregate_funding_rates(data, period)
+        if not points:
+            continue
+        series = {
+            "symbol": symbol,
+            "period": period,
+            "first": points[0][0],
+            "last": points[-1][0],
+            "segments": split_sign_segments(points),
+        }
+        save_data_to_json(series, f"{symbol.lower()}_funding_rate_{period}.json")
+
+def fetch_futures_data(endpoint, symbol, period, days_to_fetch):
+    """
+    Fetches a /futures/data/* series for the last `days_to_fetch` days (capped at the ~30 days Binance serves).
+    A single request returns at most FUTURES_DATA_LIMIT rows, so fine periods ("5m" ... "4h") are fetched in
+    consecutive startTime/endTime windows. Returns the rows sorted by timestamp, or None on failure.
+    """
+    days = min(days_to_fetch, FUTURES_DATA_MAX_DAYS)
+    period_ms = PERIOD_MS[period]
+    rows_needed = days * 86_400_000 // period_ms
+    if rows_needed <= FUTURES_DATA_LIMIT:
+        # Without startTime/endTime the API returns the most recent `limit` rows
+        return make_api_request(endpoint, {"symbol": symbol, "period": period, "limit": max(rows_needed, 1)})
+
+    end_time_ms = int(datetime.now().timestamp() * 1000)
+    start_time_ms = end_time_ms - days * 86_400_000
+    window_ms = FUTURES_DATA_LIMIT * period_ms
+    rows_by_timestamp = {}
+    for window_start in range(start_time_ms, end_time_ms + 1, window_ms):
+        params = {
+            "symbol": symbol,
+            "period": period,
+            "limit": FUTURES_DATA_LIMIT,
+            "startTime": window_start,
+            "endTime": min(window_start + window_ms - 1, end_time_ms),
+        }
+        page = make_api_request(endpoint, params)
+        if page is None:
+            return None
+        rows_by_timestamp.update((row["timestamp"], row) for row in page)
+    return [rows_by_timestamp[t] for t in sorted(rows_by_timestamp)]
+
+def snapshot_filename(symbol, metric, period):
+    """The latest-30-days snapshot read by the pages, e.g. btcusdt_open_interest_1d.json."""
+    return f"{symbol.lower()}_{metric}_{period}.json"
+
+def accumulate_history(rows, symbol, metric, period):
+    """
+    Appends rows newer than what is already stored to the local history of this series.
+    A new history is first seeded from the snapshot on disk, which may hold days the API no longer
+    serves; this has to happen before the append, as only rows newer than the last stored one are added.
+    """
+    path = history_store.history_path(HISTORY_DIR, symbol, metric, period)
+    if not os.path.exists(path):
+        snapshot = load_data_from_json(snapshot_filename(symbol, metric, period))
+        if snapshot:
+            seeded = history_store.append_rows(path, snapshot, key="timestamp")
+            print(f"History {path}: seeded {seeded} rows from the existing snapshot.")
+    added = history_store.append_rows(path, rows, key="timestamp")
+    print(f"History {path}: appended {added} new rows.")
+    return added
+
+def get_futures_data_series(metric, symbol="BTCUSDT", period="1d", days_to_fetch=30, save_snapshot=True):
+    """
+    Fetches one of the FUTURES_DATA_ENDPOINTS series for a symbol and period.
+    API provides data for the latest 30 days, so every run also appends the new rows to
+    the local history in HISTORY_DIR, which keeps older data.
+    """
+    data = fetch_futures_data(FUTURES_DATA_ENDPOINTS[metric], symbol, period, days_to_fetch)
     if data:
-        save_data_to_json(data, f"{symbol.lower()}_open_interest_{period}.json")
+        accumulate_history(data, symbol, metric, period)
+        if save_snapshot:
+            save_data_to_json(data, snapshot_filename(symbol, metric, period))
     return data
 
+def get_long_short_ratio(symbol="BTCUSDT", period="1d", days_to_fetch=30, save_snapshot=True):
+    """Fetches the global long/short account ratio for a given symbol and period."""
+    print(f"Fetching long/short ratio for {symbol} (period: {period}) for the last {days_to_fetch} days...")
+    return get_futures_data_series("long_short_ratio", symbol, period, days_to_fetch, save_snapshot)
+
+def get_open_interest_history(symbol="BTCUSDT", period="1d", days_to_fetch=30, save_snapshot=True):
+    """Fetches open interest history for a given symbol and period."""
+    print(f"Fetching open interest history for {symbol} (period: {period}) for the last {days_to_fetch} days...")
+    return get_futures_data_series("open_interest", symbol, period, days_to_fetch, save_snapshot)
+
+def get_top_trader_long_short_account_ratio(symbol="BTCUSDT", period="1d", days_to_fetch=30, save_snapshot=True):
+    """Fetches the long/short ratio of top traders' accounts for a given symbol and period."""
+    print(f"Fetching top trader long/short account ratio for {symbol} (period: {period}) for the last {days_to_fetch} days...")
+    return get_futures_data_series("top_trader_long_short_account_ratio", symbol, period, days_to_fetch, save_snapshot)
+
+def get_top_trader_long_short_position_ratio(symbol="BTCUSDT", period="1d", days_to_fetch=30, save_snapshot=True):
+    """
+    Fetches the long/short ratio of top traders' positions for a given symbol and period.
+    USD-M futures take `symbol`; COIN-M would take `pair` instead.
+    """
+    print(f"Fetching top trader long/short position ratio for {symbol} (period: {period}) for the last {days_to_fetch} days...")
+    return get_futures_data_series("top_trader_long_short_position_ratio", symbol, period, days_to_fetch, save_snapshot)
+
+FUTURES_DATA_COLLECTORS = [
+    get_long_short_ratio,
+    get_open_interest_history,
+    get_top_trader_long_short_account_ratio,
+    get_top_trader_long_short_position_ratio,
+]
+
+def build_tasks(symbol, days_for_funding=None, days_for_ls_oi=30, periods=None):
+    """
+    Returns the (name, function, kwargs) collection tasks for one symbol: funding rate history,
+    plus every futures data series for every period ("1d" also writes the snapshot used by the pages).
+    """
+    tasks = [(f"{symbol} funding_rate", get_funding_rate_history,
+              {"symbol": symbol, "days_to_fetch": days_for_funding, "incremental": True})]
+    for period in periods or HISTORY_PERIODS:
+        for collector in FUTURES_DATA_COLLECTORS:
+            tasks.append((f"{symbol} {collector.__name__[4:]} {period}", collector,
+                          {"symbol": symbol, "period": period, "days_to_fetch": days_for_ls_oi,
+                           "save_snapshot": period == "1d"}))
+    return tasks
+
+def run_collection(symbols, max_workers=MAX_WORKERS, **task_options):
+    """
+    Runs the collection tasks of every symbol concurrently on a bounded thread pool.
+    Each task retries on its own (see http_client), so one flaky endpoint does not hold up the others.
+    Returns the names of the tasks that failed.
+    """
+    tasks = [task for symbol in symbols for task in build_tasks(symbol, **task_options)]
+    print(f"Running {len(tasks)} collection tasks for {len(symbols)} symbols with {max_workers} workers...")
+    failed = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(func, **kwargs): name for name, func, kwargs in tasks}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Task {name} raised an error: {e}")
+                result = None
+            if not result:
+                failed.append(name)
+    return failed
+
 # --- Main Execution ---
 if __name__ == "__main__":
-    symbol_to_fetch = "BTCUSDT"
-    days_for_funding = 365 # Aim for 1 year, API will limit to 1000 records (approx 333 days)
-    days_for_ls_oi = 365  # Aim for 1 year, but API strictly limits these to ~30 days of history.
-
-    print(f"Starting data collection for {symbol_to_fetch}...")
-
-    # 1. Funding Rate History
-    print(f"\nFetching funding rate history (aiming for {days_for_funding} days, API max 1000 records)...")
-    get_funding_rate_history(symbol_to_fetch, days_to_fetch=days_for_funding)
-
-    # 2. Long/Short Ratio (Global) - Daily
-    print(f"\nFetching long/short ratio (aiming for {days_for_ls_oi} days, API will likely return ~30 days due to its limits)...")
-    get_long_short_ratio(symbol_to_fetch, period="1d", days_to_fetch=days_for_ls_oi)
-
-    # 3. Open Interest History - Daily
-    print(f"\nFetching open interest history (aiming for {days_for_ls_oi} days, API will likely return ~30 days due to its limits)...")
-    get_open_interest_history(symbol_to_fetch, period="1d", days_to_fetch=days_for_ls_oi)
-
-    # Example for top trader long/short ratio (accounts) - Daily for 30 days
-    # print("\nFetching top trader long/short account ratio...")
-    # params_top_trader_ls_account = {
-    # "symbol": symbol_to_fetch,
-    # "period": "1d",
-    # "limit": days, # Max 500, 30 for 30 days
-    # "endTime": int(datetime.now().timestamp() * 1000),
-    # "startTime": int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
-    # }
-    # top_trader_ls_account_data = make_api_request("/futures/data/topLongShortAccountRatio", params_top_trader_ls_account)
-    # if top_trader_ls_account_data:
-    #     save_data_to_json(top_trader_ls_account_data, f"{symbol_to_fetch.lower()}_top_trader_long_short_account_ratio_1d.json")
-
-    # Example for top trader long/short position ratio - Daily for 30 days
-    # print("\nFetching top trader long/short position ratio...")
-    # params_top_trader_ls_position = {
-    #     "symbol": symbol_to_fetch, # Note: API doc says 'pair' for COIN-M, but for USD-M it's 'symbol'
-    #     "period": "1d",
-    #     "limit": days,
-    #     "endTime": int(datetime.now().timestamp() * 1000),
-    #     "startTime": int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
-    # }
-    # # The endpoint is /futures/data/topLongShortPositionRatio.
-    # # For USDⓈ-M Futures, the parameters are symbol, period, limit, startTime, endTime.
-    # # For COIN-M Futures, the parameters are pair, period, limit, startTime, endTime.
-    # # We are using BTCUSDT which is a USDⓈ-M future.
-    # top_trader_ls_position_data = make_api_request("/futures/data/topLongShortPositionRatio", params_top_trader_ls_position)
-    # if top_trader_ls_position_data:
-    #     save_data_to_json(top_trader_ls_position_data, f"{symbol_to_fetch.lower()}_top_trader_long_short_position_ratio_1d.json")
-
-
-    print("\nAll participant data collection tasks finished.") 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Collect Binance futures participant data.")
+    parser.add_argument("--symbols", default="BTCUSDT",
+                        help="Comma-separated futures symbols (default: BTCUSDT).")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"Maximum concurrent requests across all symbols and endpoints (default: {MAX_WORKERS}).")
+    args = parser.parse_args()
+
+    symbols_to_fetch = [symbol.strip().upper() for symbol in args.symbols.split(",") if symbol.strip()]
+    days_for_funding = None # Full history back to the contract listing, topped up incrementally on reruns
+    days_for_ls_oi = 30  # The API strictly limits these to ~30 days of history; older data lives in HISTORY_DIR.
+
+    print(f"Starting data collection for {', '.join(symbols_to_fetch)}...")
+    failed_tasks = run_collection(symbols_to_fetch, max_workers=args.workers,
+                                  days_for_funding=days_for_funding, days_for_ls_oi=days_for_ls_oi)
+
+    if failed_tasks:
+        print(f"\n{len(failed_tasks)} tasks returned no data: {', '.join(sorted(failed_tasks))}")
+    print("\nAll participant data collection tasks finished.")
@@ -0,0 +1,235 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import json_writer
+
+# --- Refresh orchestrator ---
+# Runs every collector once, as a DAG: a node starts as soon as the nodes it depends on have finished,
+# so independent collectors run in parallel and a full refresh takes about as long as the slowest chain.
+# Each collector runs as its own process from the repository root, with its output streamed line by line
+# under a [node] prefix.
+#
+# Nodes with local inputs are skipped when the fingerprint of those inputs (and of the node's script)
+# matches the one recorded after its last successful run and its outputs still exist. Collectors that
+# read from the network have no local inputs and always run; they are incremental on their own.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+DATA_DIR = os.path.join(REPO_DIR, "data")
+STATE_FILE = os.path.join(DATA_DIR, "refresh_state.json")
+
+# name -> script, arguments, nodes that must finish first, local inputs and outputs (relative to the repository root)
+NODES = {
+    "klines": {
+        "script": "binance_kline_collector.py",
+        "args": ["--incremental"],
+        "deps": [],
+        "inputs": [],
+        "outputs": ["data/btcusdt_kline_1d.json"],
+    },
+    "participants": {
+        "script": "participant_data_collector.py",
+        "args": [],
+        "deps": [],
+        "inputs": [],
+        "outputs": ["data/btcusdt_funding_rate.json", "data/btcusdt_funding_rate_1d.json"],
+    },
+    "news": {
+        "script": "news_collector.py",
+        "args": [],
+        "deps": [],
+        "inputs": [],
+        "outputs": ["data/market_events_cryptocompare.json"],
+    },
+    "whale": {
+        "script": "whale_data_collector.py",
+        "args": [],
+        "deps": [],
+        "inputs": [],
+        "outputs": ["data/btc_exchange_balance.json", "data/btc_transaction_volume.json"],
+    },
+    "market_comparison": {
+        "script": "market_comparison_data.py",
+        "args": [],
+        "deps": ["klines"],
+        # Also downloads new SPY bars into data/equity/, which only this node refreshes, so it always runs
+        # (it only computes the rows after its stored rolling-window state anyway)
+        "inputs": [],
+        "outputs": ["data/volatility_comparison.json"],
+    },
+    "market_matrix": {
+        "script": "market_comparison_data.py",
+        "args": ["--matrix", "--offline"],
+        "deps": ["klines", "market_comparison"],
+        # Reads the klines and the equity bars cached by market_comparison; skipped while neither changed
+        "inputs": ["data/btcusdt_kline_1d.json", "data/btcusdt_kline_1d", "data/equity"],
+        "outputs": ["data/asset_correlation_matrix.json"],
+    },
+}
+
+_print_lock = threading.Lock()
+
+def _iter_files(path):
+    """The file itself, or every file below a directory in sorted order; nothing if the path does not exist."""
+    if os.path.isfile(path):
+        yield path
+    elif os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                yield os.path.join(root, name)
+
+def fingerprint(paths, method="hash"):
+    """
+    Fingerprint of the given files/directories: a SHA-256 of their contents ("hash"), or of their
+    modification times and sizes ("mtime", cheaper but also changes when a file is rewritten unchanged).
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        for file_path in _iter_files(path):
+            digest.update(os.path.relpath(file_path, REPO_DIR).encode("utf-8"))
+            if method == "mtime":
+                stat = os.stat(file_path)
+                digest.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode("ascii"))
+            else:
+                with open(file_path, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(block)
+    return digest.hexdigest()
+
+def node_fingerprint(node, method="hash"):
+    """Fingerprint of a node's inputs plus its script, or None for nodes without local inputs (always run)."""
+    if not node["inputs"]:
+        return None
+    paths = [os.path.join(SCRIPT_DIR, node["script"])] + [os.path.join(REPO_DIR, path) for path in node["inputs"]]
+    return fingerprint(paths, method)
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Could not read {path}, running every node: {e}")
+        return {}
+
+def run_node(name, node):
+    """Runs one collector script from the repository root, streaming its output. Returns True on success."""
+    command = [sys.executable, os.path.join(SCRIPT_DIR, node["script"])] + node["args"]
+    process = subprocess.Popen(command, cwd=REPO_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, bufsize=1, env=dict(os.environ, PYTHONUNBUFFERED="1"))
+    for line in process.stdout:
+        with _print_lock:
+            print(f"[{name}] {line.rstrip()}")
+    return process.wait() == 0
+
+def validate(nodes):
+    """Raises ValueError on unknown dependencies or cycles."""
+    for name, node in nodes.items():
+        for dep in node["deps"]:
+            if dep not in nodes:
+                raise ValueError(f"Node '{name}' depends on unknown node '{dep}'.")
+    visiting, done = set(), set()
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through node '{name}'.")
+        visiting.add(name)
+        for dep in nodes[name]["deps"]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+    for name in nodes:
+        visit(name)
+
+def refresh(nodes=NODES, only=None, force=False, method="hash", max_workers=None):
+    """
+    Runs the DAG. `only` restricts the run to some nodes (their dependencies outside the selection are
+    treated as already done). Returns {name: {"status": ran|skipped|failed|blocked, "seconds": float}}.
+    """
+    validate(nodes)
+    selected = {name: node for name, node in nodes.items() if only is None or name in only}
+    state = load_state(STATE_FILE)
+    results = {}
+    pending = dict(selected)
+    running = {}
+
+    def ready(name):
+        return all(dep not in selected or dep in results for dep in selected[name]["deps"])
+
+    def start(executor, name):
+        node = selected[name]
+        blocked = [dep for dep in node["deps"] if results.get(dep, {}).get("status") in ("failed", "blocked")]
+        if blocked:
+            print(f"Skipping {name}: {', '.join(blocked)} did not complete.")
+            results[name] = {"status": "blocked", "seconds": 0.0}
+            return
+        current = node_fingerprint(node, method)
+        outputs_exist = all(os.path.exists(os.path.join(REPO_DIR, path)) for path in node["outputs"])
+        previous = state.get(name, {})
+        if not force and current is not None and outputs_exist and \
+           previous.get("fingerprint") == current and previous.get("method") == method:
+            print(f"Skipping {name}: inputs unchanged since {previous.get('finished_at', 'the last run')}.")
+            results[name] = {"status": "skipped", "seconds": 0.0}
+            return
+        print(f"Starting {name}...")
+        running[executor.submit(run_node, name, node)] = (name, current, time.perf_counter())
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers or len(selected) or 1) as executor:
+        while pending or running:
+            for name in [name for name in pending if ready(name)]:
+                del pending[name]
+                start(executor, name)
+            if not running:
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, current, node_started = running.pop(future)
+                seconds = time.perf_counter() - node_started
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    print(f"Error running {name}: {e}")
+                    ok = False
+                results[name] = {"status": "ran" if ok else "failed", "seconds": seconds}
+                if ok:
+                    # Recomputed after the run, so a node that rewrites its own inputs is not rerun for nothing
+                    state[name] = {"fingerprint": node_fingerprint(selected[name], method) if current is not None else None,
+                                   "method": method, "finished_at": time.strftime('%Y-%m-%d %H:%M:%S'),
+                                   "seconds": round(seconds, 3)}
+                    json_writer.write_json(state, STATE_FILE)
+
+    total = time.perf_counter() - started
+    print("\nRefresh summary:")
+    for name in selected:
+        result = results[name]
+        print(f"  {name:<20} {result['status']:<8} {result['seconds']:8.1f} s")
+    print(f"  {'total (wall clock)':<20} {'':<8} {total:8.1f} s "
+          f"(sum of stages {sum(r['seconds'] for r in results.values()):.1f} s)")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh all dashboard data: run every collector as a dependency-aware parallel DAG.")
+    parser.add_argument("--only", type=lambda value: [s.strip() for s in value.split(",") if s.strip()],
+                        help=f"Comma-separated nodes to run (default: all of {', '.join(NODES)}).")
+    parser.add_argument("--force", action="store_true", help="Run every node even if its inputs are unchanged.")
+    parser.add_argument("--fingerprint", choices=["hash", "mtime"], default="hash",
+                        help="How unchanged inputs are detected: content hash (default) or modification time and size.")
+    parser.add_argument("--workers", type=int, help="Maximum nodes running at once (default: all ready nodes).")
+    args = parser.parse_args()
+    unknown = [name for name in args.only or [] if name not in NODES]
+    if unknown:
+        parser.error(f"Unknown node(s): {', '.join(unknown)}. Choose from {', '.join(NODES)}.")
+
+    results = refresh(only=args.only, force=args.force, method=args.fingerprint, max_workers=args.workers)
+    if any(result["status"] in ("failed", "blocked") for result in results.values()):
+        sys.exit(1)
@@ -0,0 +1,109 @@
+import numpy as np
+
+# --- Rolling volatility / correlation for many series at once ---
+# Window sums come from differences of cumulative sums, so every window costs O(1) instead of O(window),
+# and the cross products of all N series are summed together instead of once per pair.
+
+# Annualization used for every series (matches calculate_volatility in market_comparison_data.py)
+ANNUALIZATION_DAYS = 365
+# Rows whose N x N cross products are materialized at once; bounds memory to chunk_size * N * N floats
+CHUNK_SIZE = 1024
+
+def _window_sums(values, window):
+    """Sums of every full `window`-row window of `values` along axis 0 (len(values) - window + 1 rows)."""
+    cumulative = np.cumsum(values, axis=0)
+    sums = cumulative[window - 1:].copy()
+    sums[1:] -= cumulative[:-window]
+    return sums
+
+def rolling_volatility_correlation(returns, window, chunk_size=CHUNK_SIZE):
+    """
+    Rolling annualized volatility and correlation matrix of a T x N returns matrix without gaps.
+    Returns (volatility, correlation): arrays of shape (T - window + 1, N) and (T - window + 1, N, N);
+    row k describes the window ending at row k + window - 1. Zero-variance windows give NaN.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    n_rows, n_series = returns.shape
+    n_out = n_rows - window + 1
+    if n_out <= 0:
+        return np.empty((0, n_series)), np.empty((0, n_series, n_series))
+
+    # Centering does not change variances or correlations but keeps the cumulative sums small,
+    # which avoids cancellation when subtracting them.
+    centered = returns - returns.mean(axis=0)
+    sums = _window_sums(centered, window)
+
+    # Cross products are summed chunk by chunk; each chunk re-reads the window - 1 rows before it.
+    cross_sums = np.empty((n_out, n_series, n_series))
+    for out_start in range(0, n_out, chunk_size):
+        out_end = min(out_start + chunk_size, n_out)
+        rows = centered[out_start:out_end + window - 1]
+        cross_sums[out_start:out_end] = _window_sums(rows[:, :, None] * rows[:, None, :], window)
+
+    # Covariance and then correlation are computed in place in cross_sums, so long inputs need no extra copies
+    covariance = cross_sums
+    covariance -= sums[:, :, None] * sums[:, None, :] / window
+    covariance /= window - 1
+    del sums
+    std = np.sqrt(np.clip(np.diagonal(covariance, axis1=1, axis2=2), 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = covariance
+        correlation /= std[:, :, None] * std[:, None, :]
+    np.clip(correlation, -1.0, 1.0, out=correlation)
+    std[std == 0] = np.nan
+    std *= ANNUALIZATION_DAYS ** 0.5
+    return std, correlation
+
+def upper_triangle_pairs(names):
+    """The (i, j) index pairs with i < j, in the order used by the compact correlation output."""
+    rows, cols = np.triu_indices(len(names), k=1)
+    return list(zip(rows.tolist(), cols.tolist()))
+
+class RollingWindow:
+    """
+    Incremental rolling volatility / correlation of N series. The state is the last window - 1 rows,
+    which is all the next window needs: `extend` computes the statistics of only the new rows
+    (with the same cumulative-sum pass as above) and keeps the tail, so an update costs O(new rows)
+    however long the history is. The state round-trips through JSON with to_state / from_state.
+    """
+
+    def __init__(self, window, n_series, rows=None):
+        self.window = window
+        self.n_series = n_series
+        self.rows = np.empty((0, n_series)) if rows is None or len(rows) == 0 else np.asarray(rows, dtype=np.float64)
+
+    @classmethod
+    def from_state(cls, state, window, n_series):
+        """Restores a window from `state`, or starts an empty one if the state is missing or was built for another window size."""
+        if not state or state.get("window") != window:
+            return cls(window, n_series)
+        return cls(window, n_series, state.get("rows"))
+
+    def to_state(self):
+        return {"window": self.window, "rows": self.rows.tolist()}
+
+    def copy(self):
+        return RollingWindow(self.window, self.n_series, self.rows.copy())
+
+    def extend(self, new_rows):
+        """
+        Appends the rows (M x N) and returns (volatility, correlation) for each of them:
+        arrays of shape (M, N) and (M, N, N), NaN for rows before the first full window.
+        """
+        new_rows = np.asarray(new_rows, dtype=np.float64).reshape(-1, self.n_series)
+        n_new = len(new_rows)
+        volatility = np.full((n_new, self.n_series), np.nan)
+        correlation = np.full((n_new, self.n_series, self.n_series), np.nan)
+        if n_new == 0:
+            return volatility, correlation
+
+        rows = np.concatenate([self.rows, new_rows])
+        window_volatility, window_correlation = rolling_volatility_correlation(rows, self.window)
+        # Window k ends at row k + window - 1; the new rows start at row len(self.rows)
+        first_window = max(len(self.rows) - self.window + 1, 0)
+        n_filled = len(window_volatility) - first_window
+        if n_filled > 0:
+            volatility[n_new - n_filled:] = window_volatility[first_window:]
+            correlation[n_new - n_filled:] = window_correlation[first_window:]
+        self.rows = rows[-(self.window - 1):] if self.window > 1 else rows[:0]
+        return volatility, correlation
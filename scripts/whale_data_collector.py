@@ -1,106 +1,203 @@
 import os
-import san
-import pandas as pd
+import time
+import argparse
 from datetime import datetime, timedelta
-import json
+from concurrent.futures import ThreadPoolExecutor
+import json_writer
+import metric_store
 
 # --- Configuration ---
-# Attempt to load API key from SANTIMENT_API_KEY if SANPY_APIKEY is not set
-if not os.getenv('SANPY_APIKEY') and os.getenv('SANTIMENT_API_KEY'):
-    san.ApiConfig.api_key = os.getenv('SANTIMENT_API_KEY')
-    print("Using API key from SANTIMENT_API_KEY environment variable.")
-elif os.getenv('SANPY_APIKEY'):
-    print("Using API key from SANPY_APIKEY environment variable.")
-else:
-    print("Warning: No Santiment API key found in SANPY_APIKEY or SANTIMENT_API_KEY environment variables. Limited data access.")
-
+# Importing this module has no side effects: sanpy is imported and the API key is configured
+# on the first fetch (configure_api_key), and directories are created when files are written.
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
 
 SLUG = "bitcoin"
-TO_DATE = datetime.now()
-FROM_DATE = TO_DATE - timedelta(days=365) # Aim for 1 year, but free tier might limit this
+DAYS_TO_FETCH = 365 # Aim for 1 year, but free tier might limit this
 INTERVAL = "1d"
 
 PRICE_DATA_FILE = os.path.join(OUTPUT_DIR, 'btcusdt_kline_1d.json')
-# Changed to exchange_balance as exchange_funds_flow seems deprecated
-EXCHANGE_BALANCE_OUTPUT_FILE = os.path.join(OUTPUT_DIR, 'btc_exchange_balance.json') 
-TRANSACTION_VOLUME_OUTPUT_FILE = os.path.join(OUTPUT_DIR, 'btc_transaction_volume.json')
-
-# --- Helper function to fetch and save data ---
-def fetch_and_save_metric(metric_name, output_file, slug, from_date, to_date, interval):
-    """Fetches a given Santiment metric and saves it as JSON."""
-    print(f"Fetching {metric_name} for {slug} from {from_date.strftime('%Y-%m-%d')} to {to_date.strftime('%Y-%m-%d')}...")
-    try:
-        data_df = san.get(
-            metric_name,
-            slug=slug,
-            from_date=from_date.strftime('%Y-%m-%d'),
-            to_date=to_date.strftime('%Y-%m-%d'),
-            interval=interval
-        )
-
-        if data_df.empty:
-            print(f"No data returned for {metric_name}. This might be due to API limitations or data availability.")
-            return None
-
-        data_df.index = data_df.index.strftime('%Y-%m-%d')
-        
-        # Rename columns for consistency if they are standard Santiment names
-        if 'value' in data_df.columns and len(data_df.columns) == 1:
-            data_df = data_df.rename(columns={'value': metric_name})
-        elif metric_name == 'exchange_balance' and 'balance' in data_df.columns: # Hypothetical column name for exchange_balance
-             data_df = data_df.rename(columns={'balance': metric_name})
-        elif metric_name == 'transaction_volume' and 'transactionVolume' in data_df.columns:
-            data_df = data_df.rename(columns={'transactionVolume': metric_name})
-        # Add other specific renames if Santiment API returns different column names for other metrics
-        
-        # Ensure the main data column is named after the metric if it wasn't renamed yet
-        # This is a fallback, ideally the above renames handle it.
-        if len(data_df.columns) == 1 and data_df.columns[0] != metric_name:
-            data_df = data_df.rename(columns={data_df.columns[0]: metric_name})
-            
-        records = data_df.reset_index().to_dict(orient='records')
-        
-        with open(output_file, 'w') as f:
-            json.dump(records, f, indent=4)
-        print(f"Successfully fetched and saved {metric_name} to {output_file}")
+
+# Metrics collected for every slug; each is saved to <slug prefix>_<metric>.json, e.g. btc_exchange_balance.json
+# - exchange_balance: total balance on known exchange addresses (changed from exchange_funds_flow, which seems deprecated).
+#   An increase suggests more coins held on exchanges (potential selling pressure), a decrease suggests HODLing.
+# - transaction_volume: total amount of tokens transacted on-chain; large spikes can indicate whale activity.
+METRICS = ["exchange_balance", "transaction_volume"]
+SLUGS = [SLUG]
+# File name prefix per slug, so bitcoin keeps its existing btc_*.json files
+SLUG_PREFIXES = {"bitcoin": "btc", "ethereum": "eth"}
+
+# Long ranges are split into chunks of this many days; one failed chunk no longer loses the whole metric
+CHUNK_DAYS = 90
+# Concurrent san.get calls across all metrics and chunks
+MAX_WORKERS = 4
+# Attempts per chunk, with exponential backoff (CHUNK_RETRY_BACKOFF * 2**attempt seconds) in between
+CHUNK_ATTEMPTS = 3
+CHUNK_RETRY_BACKOFF = 2.0
+
+# Local store of every value fetched so far, keyed by (metric, slug, interval) and date (see metric_store.py)
+STORE_DIR = os.path.join(OUTPUT_DIR, 'onchain')
+# Trailing days fetched again on every run, since Santiment revises the latest values for a few days
+REFETCH_DAYS = 3
+
+_api_configured = False
+
+def configure_api_key():
+    """Imports sanpy and applies the API key from the environment (once). Returns the san module."""
+    global _api_configured
+    import san
+    if _api_configured:
+        return san
+    # Attempt to load API key from SANTIMENT_API_KEY if SANPY_APIKEY is not set
+    if not os.getenv('SANPY_APIKEY') and os.getenv('SANTIMENT_API_KEY'):
+        san.ApiConfig.api_key = os.getenv('SANTIMENT_API_KEY')
+        print("Using API key from SANTIMENT_API_KEY environment variable.")
+    elif os.getenv('SANPY_APIKEY'):
+        print("Using API key from SANPY_APIKEY environment variable.")
+    else:
+        print("Warning: No Santiment API key found in SANPY_APIKEY or SANTIMENT_API_KEY environment variables. Limited data access.")
+    _api_configured = True
+    return san
+
+def metric_output_file(metric_name, slug):
+    return os.path.join(OUTPUT_DIR, f"{SLUG_PREFIXES.get(slug, slug)}_{metric_name}.json")
+
+def split_date_range(from_date, to_date, chunk_days=CHUNK_DAYS):
+    """Splits [from_date, to_date] into consecutive (start, end) chunks of at most chunk_days days."""
+    chunks = []
+    start = from_date
+    while start < to_date:
+        end = min(start + timedelta(days=chunk_days), to_date)
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+def normalize_metric_frame(data_df, metric_name):
+    """
+    Indexes a san.get result by 'YYYY-MM-DD' date and names its value column after the metric.
+    An empty result (which may not have a DatetimeIndex) is returned as is: no data for these days is a successful fetch.
+    """
+    if data_df.empty:
         return data_df
+    data_df.index = data_df.index.strftime('%Y-%m-%d')
+    data_df.index.name = 'datetime'
 
-    except Exception as e:
-        print(f"Error fetching {metric_name}: {e}")
-        print("Please ensure you have a valid API key set as an environment variable (SANPY_APIKEY or SANTIMENT_API_KEY).")
-        print("Free tier Santiment API has limitations on data range and access to certain metrics.")
-        return None
+    # Rename columns for consistency if they are standard Santiment names
+    if 'value' in data_df.columns and len(data_df.columns) == 1:
+        data_df = data_df.rename(columns={'value': metric_name})
+    elif metric_name == 'exchange_balance' and 'balance' in data_df.columns: # Hypothetical column name for exchange_balance
+         data_df = data_df.rename(columns={'balance': metric_name})
+    elif metric_name == 'transaction_volume' and 'transactionVolume' in data_df.columns:
+        data_df = data_df.rename(columns={'transactionVolume': metric_name})
+    # Add other specific renames if Santiment API returns different column names for other metrics
+
+    # Ensure the main data column is named after the metric if it wasn't renamed yet
+    # This is a fallback, ideally the above renames handle it.
+    if len(data_df.columns) == 1 and data_df.columns[0] != metric_name:
+        data_df = data_df.rename(columns={data_df.columns[0]: metric_name})
+    return data_df
+
+def fetch_metric_chunk(metric_name, slug, from_date, to_date, interval):
+    """
+    Fetches one date chunk of a Santiment metric, retrying with backoff.
+    Returns the normalized DataFrame (possibly empty), or None if every attempt failed.
+    """
+    san = configure_api_key()
+    for attempt in range(CHUNK_ATTEMPTS):
+        try:
+            data_df = san.get(
+                metric_name,
+                slug=slug,
+                from_date=from_date.strftime('%Y-%m-%d'),
+                to_date=to_date.strftime('%Y-%m-%d'),
+                interval=interval
+            )
+            return normalize_metric_frame(data_df, metric_name)
+        except Exception as e:
+            if attempt == CHUNK_ATTEMPTS - 1:
+                print(f"Error fetching {metric_name} for {slug} {from_date.strftime('%Y-%m-%d')} -> {to_date.strftime('%Y-%m-%d')}: {e}")
+                return None
+            delay = CHUNK_RETRY_BACKOFF * 2 ** attempt
+            print(f"Error fetching {metric_name} for {slug} ({e}). Retrying in {delay:.0f} seconds...")
+            time.sleep(delay)
+
+def collect_metrics(metrics, slugs, from_date, to_date, interval=INTERVAL, chunk_days=CHUNK_DAYS, max_workers=MAX_WORKERS,
+                    refetch_days=REFETCH_DAYS, full=False):
+    """
+    Brings every (metric, slug) pair up to date over [from_date, to_date]. Only the days missing from the local
+    metric store (plus the last `refetch_days` days, for late revisions) are requested, split into date chunks
+    that are all fetched concurrently through one bounded thread pool. With full=True the whole range is fetched again.
+    Each metric's output file is then rewritten from its store, so it keeps history older than the requested range.
+    Chunks that fail are reported and retried on the next run. Returns {(metric, slug): number of stored days}.
+    """
+    stores = {}
+    chunks = []
+    for metric_name in metrics:
+        for slug in slugs:
+            path = metric_store.store_path(STORE_DIR, metric_name, slug, interval)
+            store = metric_store.load_store(path, metric_name, slug, interval)
+            stores[(metric_name, slug)] = (store, path)
+            if full:
+                ranges = [(from_date.date(), to_date.date())]
+            else:
+                ranges = metric_store.missing_ranges(store, from_date.date(), to_date.date(), refetch_days)
+            for range_start, range_end in ranges:
+                start = datetime.combine(range_start, datetime.min.time())
+                end = datetime.combine(range_end, datetime.min.time())
+                for chunk_start, chunk_end in split_date_range(start, end, chunk_days) or [(start, end)]:
+                    chunks.append((metric_name, slug, chunk_start, chunk_end))
+
+    configure_api_key()
+    print(f"Fetching {len(chunks)} chunk(s) of at most {chunk_days} days for {len(metrics)} metric(s) and {len(slugs)} slug(s), "
+          f"{max_workers} at a time...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # to_date is passed one day later so the chunk's last day is always part of the response
+        futures = [(chunk, executor.submit(fetch_metric_chunk, chunk[0], chunk[1], chunk[2], chunk[3] + timedelta(days=1), interval))
+                   for chunk in chunks]
+        results = [(chunk, future.result()) for chunk, future in futures]
+
+    for (metric_name, slug, start, end), part in results:
+        store, _ = stores[(metric_name, slug)]
+        if part is None:
+            print(f"Missing {metric_name} for {slug}: {start.strftime('%Y-%m-%d')} -> {end.strftime('%Y-%m-%d')}; will retry next run.")
+            continue
+        values = part[metric_name].dropna().to_dict() if metric_name in part.columns else {}
+        metric_store.add_values(store, values, start.date(), end.date())
+
+    collected = {}
+    for (metric_name, slug), (store, path) in stores.items():
+        metric_store.save_store(store, path)
+        if not store["values"]:
+            print(f"No data returned for {metric_name} ({slug}). This might be due to API limitations or data availability.")
+            print("Please ensure you have a valid API key set as an environment variable (SANPY_APIKEY or SANTIMENT_API_KEY).")
+            print("Free tier Santiment API has limitations on data range and access to certain metrics.")
+            collected[(metric_name, slug)] = 0
+            continue
+        output_file = metric_output_file(metric_name, slug)
+        json_writer.write_json(metric_store.records(store, metric_name), output_file)
+        print(f"Saved {metric_name} for {slug} ({len(store['values'])} days) to {output_file}")
+        collected[(metric_name, slug)] = len(store["values"])
+    return collected
+
+def _split_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
 
 # --- Main script execution ---
 if __name__ == "__main__":
-    print("Starting whale data collection...")
+    parser = argparse.ArgumentParser(description="Fetch Santiment on-chain metrics.")
+    parser.add_argument("--metrics", type=_split_list, default=METRICS,
+                        help=f"Comma-separated Santiment metrics (default: {','.join(METRICS)}).")
+    parser.add_argument("--slugs", type=_split_list, default=SLUGS,
+                        help=f"Comma-separated asset slugs (default: {','.join(SLUGS)}).")
+    parser.add_argument("--days", type=int, default=DAYS_TO_FETCH, help=f"Days of history to fetch (default: {DAYS_TO_FETCH}).")
+    parser.add_argument("--chunk-days", type=int, default=CHUNK_DAYS, help=f"Days per request (default: {CHUNK_DAYS}).")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help=f"Concurrent requests (default: {MAX_WORKERS}).")
+    parser.add_argument("--refetch-days", type=int, default=REFETCH_DAYS,
+                        help=f"Trailing days fetched again to pick up revisions (default: {REFETCH_DAYS}).")
+    parser.add_argument("--full", action="store_true", help="Fetch the whole range again instead of only the missing days.")
+    args = parser.parse_args()
 
-    # 1. Fetch Exchange Balance
-    # This metric shows the total balance of Bitcoin on known exchange addresses.
-    # An increase suggests more BTC held on exchanges (potential selling pressure or for trading).
-    # A decrease suggests BTC moving off exchanges (potential HODLing or use in DeFi).
-    fetch_and_save_metric(
-        metric_name="exchange_balance", 
-        output_file=EXCHANGE_BALANCE_OUTPUT_FILE,
-        slug=SLUG,
-        from_date=FROM_DATE,
-        to_date=TO_DATE,
-        interval=INTERVAL
-    )
-
-    # 2. Fetch Transaction Volume (On-chain)
-    # This is the total amount of tokens transacted on the blockchain.
-    # Large spikes can indicate whale activity.
-    fetch_and_save_metric(
-        metric_name="transaction_volume",
-        output_file=TRANSACTION_VOLUME_OUTPUT_FILE,
-        slug=SLUG,
-        from_date=FROM_DATE,
-        to_date=TO_DATE,
-        interval=INTERVAL
-    )
-
-    print("Whale data collection finished.") 
\ No newline at end of file
+    print("Starting whale data collection...")
+    to_date = datetime.now()
+    collect_metrics(args.metrics, args.slugs, to_date - timedelta(days=args.days), to_date,
+                    chunk_days=args.chunk_days, max_workers=args.workers, refetch_days=args.refetch_days, full=args.full)
+    print("Whale data collection finished.")
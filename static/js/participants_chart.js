@@ -1,6 +1,7 @@
 document.addEventListener('DOMContentLoaded', async () => {
     const DATA_FILES = {
-        fundingRate: '../data/btcusdt_funding_rate.json',
+        // Daily funding series precomputed by participant_data_collector.py (btcusdt_funding_rate_1w.json is weekly)
+        fundingRate: '../data/btcusdt_funding_rate_1d.json',
         longShortRatio: '../data/btcusdt_long_short_ratio_1d.json',
         openInterest: '../data/btcusdt_open_interest_1d.json',
         klineData: '../data/btcusdt_kline_1d.json'
@@ -85,71 +86,9 @@ document.addEventListener('DOMContentLoaded', async () => {
         return filteredData;
     }
 
-    // --- Helper function to aggregate funding rate to daily (last rate of the day at UTC midnight) ---
-    function aggregateFundingRateToDaily(fundingDataRaw) {
-        if (!fundingDataRaw || fundingDataRaw.length === 0) return [];
-
-        const dailyRates = {}; // Store the last rate for each day, keyed by YYYY-MM-DD
-
-        // Ensure raw data is sorted by time to easily get the last rate if needed, though forEach covers all points
-        const sortedFundingDataRaw = [...fundingDataRaw].sort((a, b) => new Date(a.fundingTime) - new Date(b.fundingTime));
-
-        sortedFundingDataRaw.forEach(item => {
-            const date = new Date(item.fundingTime);
-            // Create a key for the day (e.g., "2023-10-26") by taking the date part of ISO string
-            const dayKey = date.toISOString().split('T')[0];
-            dailyRates[dayKey] = parseFloat(item.fundingRate); // This will overwrite earlier rates for the same day, effectively taking the last one due to sort
-        });
-
-        // Convert back to an array of objects suitable for the chart
-        return Object.entries(dailyRates).map(([dayKey, rate]) => ({
-            x: new Date(dayKey + 'T00:00:00.000Z'), // Date object at UTC midnight
-            y: rate 
-        })).sort((a, b) => a.x - b.x); // Sort by date again as object key order is not guaranteed
-    }
-
-    // --- Helper function: Split funding rate into positive/negative segments for correct coloring ---
-    function splitFundingRateSegments(data) {
-        if (!data || data.length === 0) return [];
-        const segments = [];
-        let currentSegment = [];
-        let currentSign = Math.sign(data[0].y);
-
-        for (let i = 0; i < data.length; i++) {
-            const point = data[i];
-            const sign = Math.sign(point.y);
-
-            if (sign === 0) {
-                // 0點視為分界，單獨一個點
-                if (currentSegment.length > 0) segments.push({data: currentSegment, sign: currentSign});
-                segments.push({data: [point], sign: 0});
-                currentSegment = [];
-                currentSign = 0;
-            } else if (sign !== currentSign && currentSegment.length > 0) {
-                // 跨越0軸，插入一個y=0的插值點
-                const prev = data[i-1];
-                // 線性插值找出交點
-                const t = prev.y / (prev.y - point.y);
-                const zeroX = prev.x instanceof Date && point.x instanceof Date
-                    ? new Date(prev.x.getTime() + t * (point.x.getTime() - prev.x.getTime()))
-                    : prev.x + t * (point.x - prev.x);
-                const zeroPoint = {x: zeroX, y: 0};
-                currentSegment.push(zeroPoint);
-                segments.push({data: currentSegment, sign: currentSign});
-                // 新段落從0點開始
-                currentSegment = [zeroPoint, point];
-                currentSign = sign;
-            } else {
-                currentSegment.push(point);
-            }
-        }
-        if (currentSegment.length > 0) segments.push({data: currentSegment, sign: currentSign});
-        return segments;
-    }
-
     // --- Chart Rendering Functions ---
 
-    function renderFundingRateChart(fundingData, priceData) {
+    function renderFundingRateChart(fundingSeries, priceData) {
         const chartElement = document.getElementById('fundingRateChart');
         if (!chartElement) {
             console.error('Canvas element for funding rate chart not found!');
@@ -160,17 +99,16 @@ document.addEventListener('DOMContentLoaded', async () => {
             console.error('Parent element for funding rate chart canvas not found!');
             return;
         }
-        if (!fundingData || fundingData.length === 0) {
+        if (!fundingSeries || !fundingSeries.segments || fundingSeries.segments.length === 0) {
             console.warn('No funding rate data to render.');
             parentElement.innerHTML += '<p>Funding rate data is currently unavailable.</p>';
             return;
         }
         
-        // Prepare data for the funding rate segments
-        const fundingSegments = splitFundingRateSegments(fundingData);
-        const fundingDatasets = fundingSegments.map((seg, idx) => ({
+        // The series comes already split into positive/negative segments (with the zero crossings) for coloring
+        const fundingDatasets = fundingSeries.segments.map((seg, idx) => ({
             label: seg.sign > 0 ? 'Funding Rate (Positive)' : seg.sign < 0 ? 'Funding Rate (Negative)' : 'Funding Rate (Zero)',
-            data: seg.data,
+            data: seg.points.map(([x, y]) => ({ x, y })),
             yAxisID: 'yFundingRate',
             borderColor: seg.sign > 0 ? BORDER_GREEN : seg.sign < 0 ? BORDER_RED : 'rgba(200,200,200,0.7)',
             backgroundColor: seg.sign > 0 ? BINANCE_GREEN : seg.sign < 0 ? BINANCE_RED : 'rgba(200,200,200,0.1)',
@@ -659,21 +597,20 @@ document.addEventListener('DOMContentLoaded', async () => {
     // --- Load all data and render charts ---
     console.log("Fetching all data...");
     const klineDataRaw = await fetchData(DATA_FILES.klineData);
-    const fundingRateDataRaw = await fetchData(DATA_FILES.fundingRate);
+    const fundingSeries = await fetchData(DATA_FILES.fundingRate);
     const longShortRatioDataRaw = await fetchData(DATA_FILES.longShortRatio);
     const openInterestDataRaw = await fetchData(DATA_FILES.openInterest);
 
     const fullPriceChartData = preparePriceData(klineDataRaw);
 
-    const sortedFundingRateDataRaw = fundingRateDataRaw ? fundingRateDataRaw.sort((a,b) => new Date(a.fundingTime) - new Date(b.fundingTime)) : [];
-    const dailyFundingChartData = aggregateFundingRateToDaily(fundingRateDataRaw || []);
 
     const sortedLsRatioData = longShortRatioDataRaw ? longShortRatioDataRaw.sort((a,b) => new Date(a.timestamp) - new Date(b.timestamp)) : [];
     const sortedOiData = openInterestDataRaw ? openInterestDataRaw.sort((a,b) => new Date(a.timestamp) - new Date(b.timestamp)) : [];
 
-    if (dailyFundingChartData.length > 0) {
-        const priceDataForFundingRate = filterPriceDataToRange(fullPriceChartData, dailyFundingChartData, 'x');
-        renderFundingRateChart(dailyFundingChartData, priceDataForFundingRate);
+    if (fundingSeries && fundingSeries.segments && fundingSeries.segments.length > 0) {
+        const fundingRange = [{ x: fundingSeries.first }, { x: fundingSeries.last }];
+        const priceDataForFundingRate = filterPriceDataToRange(fullPriceChartData, fundingRange, 'x');
+        renderFundingRateChart(fundingSeries, priceDataForFundingRate);
     }
     if (sortedLsRatioData.length > 0) {
         const priceDataForLs = filterPriceDataToRange(fullPriceChartData, sortedLsRatioData, 'timestamp');
@@ -11,18 +11,58 @@ async function fetchData(url) {
     }
 }
 
+// Date-partitioned event index written by news_collector.py: manifest.json holds the per-day event counts,
+// YYYY-MM.json holds that month's events keyed by date and is only fetched when a date of that month is shown.
+const eventsIndexUrl = '../../data/market_events_index/';
+const eventsDataUrl = '../../data/market_events_cryptocompare.json';
+
+async function loadEventIndex() {
+    const manifest = await fetchData(`${eventsIndexUrl}manifest.json`);
+    if (manifest && manifest.counts) {
+        const shardRequests = {};
+        return {
+            counts: manifest.counts,
+            eventsForDate: async (dateStr) => {
+                const month = dateStr.slice(0, 7);
+                if (!shardRequests[month]) {
+                    shardRequests[month] = fetchData(`${eventsIndexUrl}${month}.json`);
+                }
+                const shard = await shardRequests[month];
+                return (shard && shard[dateStr]) || [];
+            }
+        };
+    }
+
+    // No index yet: fall back to the full events file and group it in the browser
+    console.warn("Event index not found, loading the full events file instead.");
+    const eventsData = await fetchData(eventsDataUrl);
+    if (!eventsData) return null;
+    const eventsByDate = {};
+    for (const event of eventsData) {
+        const eventDate = event.date;
+        if (!eventDate || typeof eventDate !== 'string') continue;
+        if (!eventsByDate[eventDate]) {
+            eventsByDate[eventDate] = [];
+        }
+        eventsByDate[eventDate].push(event);
+    }
+    const counts = {};
+    for (const dateKey in eventsByDate) {
+        counts[dateKey] = eventsByDate[dateKey].length;
+    }
+    return { counts, eventsForDate: async (dateStr) => eventsByDate[dateStr] || [] };
+}
+
 async function initChart() {
     const klineDataUrl = '../../data/btcusdt_kline_1d.json';
-    const eventsDataUrl = '../../data/market_events_cryptocompare.json';
 
-    const klineData = await fetchData(klineDataUrl);
-    const eventsData = await fetchData(eventsDataUrl);
+    const [klineData, eventIndex] = await Promise.all([fetchData(klineDataUrl), loadEventIndex()]);
 
     const chartCanvas = document.getElementById('priceEventsChart');
     const chartParentContainer = chartCanvas ? chartCanvas.parentElement : null;
     const eventsDisplayDiv = document.getElementById('eventsDisplay');
 
-    if (!klineData || !eventsData) {
+    if (!klineData || !eventIndex) {
         console.error("Failed to load kline or events data. Chart cannot be initialized.");
         if(chartParentContainer) chartParentContainer.innerHTML = "<p style='color:red; text-align:center;'>圖表數據加載失敗 (無法獲取必要的數據檔案)，請檢查瀏覽器控制台的錯誤訊息。</p>";
         if(eventsDisplayDiv) eventsDisplayDiv.innerHTML = "<p>數據加載失敗，無法顯示事件。</p>";
@@ -64,40 +104,31 @@ async function initChart() {
     }
     
     console.log(`Processed ${labels.length} K-line data points successfully.`);
-    console.log(`Loaded ${eventsData.length} events.`);
-
-    const eventsByDate = {};
-    for (const event of eventsData) {
-        const eventDate = event.date; 
-        if (!eventDate || typeof eventDate !== 'string') {
-            // console.warn("Skipping event with invalid date:", event);
-            continue;
-        }
-        if (!eventsByDate[eventDate]) {
-            eventsByDate[eventDate] = [];
-        }
-        eventsByDate[eventDate].push(event);
-    }
-    console.log("Processed events by date. Sample (first 5 dates with events):");
-    let eventSampleCount = 0;
-    for (const dateKey in eventsByDate) {
-        if (eventSampleCount < 5) {
-            // console.log(dateKey, eventsByDate[dateKey]);
-            eventSampleCount++;
-        } else {
-            break;
-        }
-    }
+    const eventCounts = eventIndex.counts;
+    console.log(`Loaded event counts for ${Object.keys(eventCounts).length} dates.`);
 
     let isEventDisplayLocked = false;
     let lockedDateStr = null;
+    let displayedDateStr = null; // Latest date requested, so a slow shard download cannot overwrite a newer hover
 
-    function updateEventsDisplayForDate(dateStr, chartInstance) {
+    async function updateEventsDisplayForDate(dateStr, chartInstance) {
         if (!eventsDisplayDiv) return;
-        if (eventsByDate[dateStr] && eventsByDate[dateStr].length > 0) {
+        displayedDateStr = dateStr;
+        if (!eventCounts[dateStr]) {
+            eventsDisplayDiv.innerHTML = `<p>日期 ${dateStr} 沒有記錄的相關事件。</p>`;
+            return;
+        }
+        const dayEvents = await eventIndex.eventsForDate(dateStr);
+        if (displayedDateStr !== dateStr) return;
+        if (dayEvents.length > 0) {
             let htmlContent = `<h4>${dateStr} 的事件:</h4><ul>`;
-            eventsByDate[dateStr].forEach(ev => {
-                htmlContent += `<li><a href="${ev.url}" target="_blank" title="${ev.description || ev.title}">${ev.title}</a> (來源: ${ev.source})</li>`;
+            dayEvents.forEach(ev => {
+                // Near-duplicate copies of the story are collapsed into ev.sources by news_collector.py
+                const otherSources = (ev.sources || []).filter(s => s.url !== ev.url);
+                const otherSourcesHtml = otherSources.length > 0
+                    ? `，另見: ${otherSources.map(s => `<a href="${s.url}" target="_blank">${s.source}</a>`).join('、')}`
+                    : '';
+                htmlContent += `<li><a href="${ev.url}" target="_blank" title="${ev.description || ev.title}">${ev.title}</a> (來源: ${ev.source}${otherSourcesHtml})</li>`;
             });
             htmlContent += '</ul>';
             eventsDisplayDiv.innerHTML = htmlContent;
@@ -130,14 +161,14 @@ async function initChart() {
                     const dateLabel = context.chart.data.labels[context.dataIndex];
                     if (!(dateLabel instanceof Date) || isNaN(dateLabel.getTime())) return 'rgba(75, 192, 192, 1)';
                     const dateStr = dateLabel.toISOString().split('T')[0];
-                    return eventsByDate[dateStr] && eventsByDate[dateStr].length > 0 ? 'rgba(255, 99, 132, 1)' : 'rgba(75, 192, 192, 1)';
+                    return eventCounts[dateStr] > 0 ? 'rgba(255, 99, 132, 1)' : 'rgba(75, 192, 192, 1)';
                 },
                  pointBorderColor: function(context) {
                     if (!context.chart.data.labels || context.chart.data.labels.length === 0 || !context.chart.data.labels[context.dataIndex]) return 'rgba(75, 192, 192, 1)';
                     const dateLabel = context.chart.data.labels[context.dataIndex];
                     if (!(dateLabel instanceof Date) || isNaN(dateLabel.getTime())) return 'rgba(75, 192, 192, 1)';
                     const dateStr = dateLabel.toISOString().split('T')[0];
-                    return eventsByDate[dateStr] && eventsByDate[dateStr].length > 0 ? 'rgba(255, 99, 132, 1)' : 'rgba(75, 192, 192, 1)';
+                    return eventCounts[dateStr] > 0 ? 'rgba(255, 99, 132, 1)' : 'rgba(75, 192, 192, 1)';
                 }
             }]
         },
@@ -192,8 +223,8 @@ async function initChart() {
                             const dateValue = new Date(tooltipItems[0].parsed.x);
                             if (!(dateValue instanceof Date) || isNaN(dateValue.getTime())) return null;
                             const dateStr = dateValue.toISOString().split('T')[0];
-                            if (eventsByDate[dateStr] && eventsByDate[dateStr].length > 0) {
-                                return `事件: ${eventsByDate[dateStr].length}`;
+                            if (eventCounts[dateStr] > 0) {
+                                return `事件: ${eventCounts[dateStr]}`;
                             }
                             return null;
                         }
@@ -203,6 +234,7 @@ async function initChart() {
             onHover: (event, chartElements) => {
                 if (isEventDisplayLocked) return; // Do nothing if display is locked
 
+                displayedDateStr = null;
                 if (eventsDisplayDiv) eventsDisplayDiv.innerHTML = '<p>將滑鼠懸停在圖表上的數據點以查看相關事件。點擊圖表上的點可鎖定/解鎖當日事件列表。</p>';
                 if (chartElements.length > 0 && priceEventsChart.data.labels && priceEventsChart.data.labels.length > 0) {
                     const dataIndex = chartElements[0].index;
@@ -232,6 +264,7 @@ async function initChart() {
                                 // Unlock if clicking the same locked date
                                 isEventDisplayLocked = false;
                                 lockedDateStr = null;
+                                displayedDateStr = null;
                                 if (eventsDisplayDiv) eventsDisplayDiv.innerHTML = '<p>事件列表已解鎖。將滑鼠懸停在圖表上的數據點以查看相關事件。</p>';
                                 // Optionally, trigger a hover update if mouse is still over a point
                                 // For simplicity, we'll let the next hover event handle it.